@@ -0,0 +1,138 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def status_of(result: Any) -> Optional[int]:
+    """Pull an HTTP status out of the result shapes http_get returns: an int, or a tuple starting with one."""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    return result if isinstance(result, int) else None
+
+
+def is_failure(result: Any) -> bool:
+    """Treat exceptions, -1 statuses (timeouts) and 429/503 responses as overload signals.
+
+    A tuple whose status slot holds an error string, as -3b's http_get
+    returns for timeouts, counts as a failure too.
+    """
+    if isinstance(result, BaseException):
+        return True
+    if isinstance(result, tuple) and result and isinstance(result[0], str):
+        return True
+    status = status_of(result)
+    return status is not None and (status < 0 or status in (429, 503))
+
+
+class HostState:
+    def __init__(self, limit: float, window: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.failures: Deque[bool] = deque(maxlen=window)
+        self.baseline: Optional[float] = None
+        self.since_decrease = 0
+
+
+class AdaptiveLimiter:
+    """Per-host AIMD concurrency limit driven by latency and error feedback.
+
+    Every successful response raises a host's limit by increase / limit, so it
+    grows by about `increase` per round trip. A failure (see is_failure), an
+    error rate over error_threshold, or a recent p50 latency above
+    latency_tolerance * the best p50 seen so far multiplies the limit by
+    `decrease`. The limit is cut at most once per `limit` completions, so one
+    burst of failures does not collapse it to min_limit. Use limit(host) or
+    snapshot() to see where each host has settled.
+    """
+
+    def __init__(self, initial: int = 10, min_limit: int = 1, max_limit: int = 200,
+                 increase: float = 1.0, decrease: float = 0.5, latency_tolerance: float = 2.0,
+                 error_threshold: float = 0.1, window: int = 100):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.window = window
+        self._hosts: Dict[str, HostState] = {}
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(float(self.initial), self.window)
+        return state
+
+    def limit(self, host: str) -> int:
+        return int(self._state(host).limit)
+
+    async def acquire(self, host: str):
+        state = self._state(host)
+        if state.in_flight < int(state.limit) and not state.waiters:
+            state.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot(state)
+            else:
+                state.waiters.remove(waiter)
+            raise
+
+    def release(self, host: str, latency: float, failed: bool):
+        state = self._state(host)
+        state.latencies.append(latency)
+        state.failures.append(failed)
+        state.since_decrease += 1
+        if failed or self._congested(state):
+            if state.since_decrease >= state.limit:
+                state.limit = max(float(self.min_limit), state.limit * self.decrease)
+                state.since_decrease = 0
+                # Judge the new limit on fresh samples only.
+                state.latencies.clear()
+                state.failures.clear()
+        else:
+            state.limit = min(float(self.max_limit), state.limit + self.increase / state.limit)
+        self._release_slot(state)
+
+    def discard(self, host: str):
+        """Free a slot without recording a sample, for requests cancelled before they finished."""
+        self._release_slot(self._state(host))
+
+    def _release_slot(self, state: HostState):
+        state.in_flight -= 1
+        while state.waiters and state.in_flight < int(state.limit):
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                state.in_flight += 1
+                waiter.set_result(None)
+
+    def _congested(self, state: HostState) -> bool:
+        if len(state.latencies) < 10:
+            return False
+        p50 = percentile(state.latencies, 0.5)
+        if state.baseline is None or p50 < state.baseline:
+            state.baseline = p50
+        error_rate = sum(state.failures) / len(state.failures)
+        return error_rate > self.error_threshold or p50 > self.latency_tolerance * state.baseline
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {host: {"limit": int(state.limit),
+                       "in_flight": state.in_flight,
+                       "p50": percentile(state.latencies, 0.5),
+                       "p99": percentile(state.latencies, 0.99),
+                       "error_rate": sum(state.failures) / len(state.failures) if state.failures else 0.0}
+                for host, state in self._hosts.items()}
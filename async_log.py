@@ -0,0 +1,131 @@
+import atexit
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO, Union
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+
+class AsyncLogger:
+    """Structured JSON-lines logger that keeps formatting and stream writes off the caller's path.
+
+    A record below `level`, or one lost to sampling, costs a compare (and a
+    random() call when sampled) and is never formatted. Accepted records are
+    queued as raw tuples. A background thread formats them in batches and
+    writes each batch with a single write() call. When the queue is full,
+    records are dropped and counted rather than blocking the event loop.
+    `sample` is a rate for every event, or a dict of per-event rates (events
+    not listed are always kept). The writer thread starts on the first record
+    and again after a fork, so each worker process gets its own. close() is
+    registered with atexit, so records still queued at interpreter exit are
+    written out.
+    """
+
+    def __init__(self, level: int = INFO, sample: Union[float, Dict[str, float]] = 1.0,
+                 stream: Optional[TextIO] = None, max_queue: int = 10000, batch_size: int = 512):
+        self.level = level
+        self.sample = sample
+        self.stream = stream
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._writer: Optional[threading.Thread] = None
+        self._pid = 0
+        atexit.register(self.close)
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, event: str, **fields: Any):
+        if level < self.level:
+            return
+        rate = self.sample if not isinstance(self.sample, dict) else self.sample.get(event, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait((time.time(), level, event, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def debug(self, event: str, **fields: Any):
+        if self.level <= DEBUG:
+            self.log(DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any):
+        if self.level <= INFO:
+            self.log(INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any):
+        if self.level <= WARNING:
+            self.log(WARNING, event, **fields)
+
+    def error(self, event: str, **fields: Any):
+        if self.level <= ERROR:
+            self.log(ERROR, event, **fields)
+
+    def _start(self):
+        self._pid = os.getpid()
+        # A queue inherited through fork may hold the parent's records or a held lock.
+        self._queue = queue.Queue(self._queue.maxsize)
+        self._writer = threading.Thread(target=self._write_loop, name="async-log-writer", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
+        pid = self._pid
+        while True:
+            record = self._queue.get()
+            batch = []
+            while record is not None:
+                batch.append(self._format(record, pid))
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                stream = self.stream or sys.stderr
+                stream.write("".join(batch))
+                stream.flush()
+            if record is None:
+                return
+
+    @staticmethod
+    def _format(record, pid: int) -> str:
+        timestamp, level, event, fields = record
+        line = {"ts": round(timestamp, 6), "level": LEVEL_NAMES.get(level, level), "event": event, "pid": pid}
+        line.update(fields)
+        return json.dumps(line, default=str) + "\n"
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued records and stop the writer thread."""
+        writer = self._writer
+        if writer is None or self._pid != os.getpid():
+            return
+        self._queue.put(None)
+        writer.join(timeout)
+        self._writer = None
+        self._pid = 0
+
+
+def _from_env() -> AsyncLogger:
+    level = LEVELS.get(os.environ.get("FETCH_LOG_LEVEL", "info").lower(), INFO)
+    sample = float(os.environ.get("FETCH_LOG_SAMPLE", "1.0"))
+    return AsyncLogger(level=level, sample=sample)
+
+
+# Shared logger for the fetch scripts. Per-response records are logged at DEBUG,
+# so they cost almost nothing unless FETCH_LOG_LEVEL=debug.
+log = _from_env()
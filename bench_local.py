@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import contextlib
+import http
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from fetch_engine import fetch_bounded
+from raw_http import StatusProber
+from transports import TRANSPORTS, get_transport
+
+HERE = Path(__file__).resolve().parent
+
+# The backends under test are the existing scripts, loaded by file name.
+BACKENDS = {
+    "aiohttp": "concurrent_HTTP_requests-1.py",
+    "httpx": "concurrent_HTTP_requests-3b.py",
+}
+
+
+class TransportScript:
+    """Give a transports.py backend the http_get / http_get_parallel / http_get_serial shape of the scripts."""
+
+    def __init__(self, name: str):
+        self.transport = get_transport(name)
+
+    async def http_get(self, url: str, timeout: int = 10) -> int:
+        return (await self.transport.get(url, timeout)).status
+
+    async def http_get_parallel(self, urls: List[str], timeout: int = 10, concurrency: int = 100) -> List[int]:
+        return await fetch_bounded(urls, lambda url: self.http_get(url, timeout),
+                                   concurrency=concurrency, per_host=concurrency)
+
+    async def http_get_serial(self, urls: List[str], timeout: int = 10) -> List[int]:
+        return [await self.http_get(url, timeout) for url in urls]
+
+
+class ProbeScript(TransportScript):
+    """Status-only probing through raw_http.StatusProber, benchmarked as backend "probe"."""
+
+    def __init__(self):
+        self.transport = StatusProber()
+
+    async def http_get(self, url: str, timeout: int = 10) -> int:
+        return await asyncio.wait_for(self.transport.probe(url), timeout)
+
+
+def load_script(file_name: str):
+    spec = importlib.util.spec_from_file_location(Path(file_name).stem.replace("-", "_"), HERE / file_name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class LocalServer:
+    """Minimal keep-alive HTTP/1.1 server on 127.0.0.1 standing in for httpbin.org.
+
+    Endpoints:
+      /delay/<ms>          empty 200 after <ms> milliseconds
+      /bytes/<n>           <n> byte body
+      /error/<percent>     500 for <percent>% of requests, 200 otherwise
+      /drip/<n>?ms=<ms>    <n> byte body sent in 10 chunks, <ms> apart
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._bodies: Dict[int, bytes] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _body(self, size: int) -> bytes:
+        body = self._bodies.get(size)
+        if body is None:
+            body = self._bodies[size] = b"x" * size
+        return body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while request_line := await reader.readline():
+                while (await reader.readline()).strip():
+                    pass
+                self.requests += 1
+                method, target = request_line.split(b" ")[:2]
+                target = target.decode("latin-1")
+                path, _, query = target.partition("?")
+                parts = path.strip("/").split("/")
+                name, argument = parts[0], parts[1] if len(parts) > 1 else "0"
+                status, body = 200, b""
+                if name == "delay":
+                    await asyncio.sleep(float(argument) / 1000)
+                elif name == "bytes":
+                    body = self._body(int(argument))
+                elif name == "error":
+                    if random.random() * 100 < float(argument):
+                        status = 500
+                elif name == "drip":
+                    params = dict(pair.split("=", 1) for pair in query.split("&") if "=" in pair)
+                    if method != b"HEAD":
+                        await self._drip(writer, int(argument), float(params.get("ms", "10")) / 1000)
+                        continue
+                    body = self._body(int(argument))
+                else:
+                    status = 404
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Length: %d\r\nContent-Type: text/plain\r\n\r\n"
+                             % (status, http.HTTPStatus(status).phrase.encode(), len(body))
+                             + (body if method != b"HEAD" else b""))
+                await writer.drain()
+        except (ConnectionError, ValueError, IndexError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown; returning quietly avoids 3.11's noisy callback on cancelled handlers.
+            pass
+        finally:
+            writer.close()
+
+    async def _drip(self, writer: asyncio.StreamWriter, size: int, interval: float):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % size)
+        chunk, remainder = divmod(size, 10)
+        for index in range(10):
+            writer.write(self._body(chunk + (remainder if index == 9 else 0)))
+            await writer.drain()
+            await asyncio.sleep(interval)
+
+
+def percentile_ms(sorted_latencies: List[float], fraction: float) -> float:
+    if not sorted_latencies:
+        return 0.0
+    return 1000 * sorted_latencies[min(len(sorted_latencies) - 1, int(fraction * len(sorted_latencies)))]
+
+
+def current_rss_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        return None
+
+
+async def run_case(module, mode: str, urls: List[str], concurrency: int, timeout: int) -> dict:
+    """Run one batch through module.http_get_parallel or http_get_serial and measure it.
+
+    Per-request latency is taken by temporarily wrapping the module's http_get,
+    which both batch functions look up at call time.
+    """
+    latencies: List[float] = []
+    original = module.http_get
+
+    async def timed_http_get(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start_time)
+
+    module.http_get = timed_http_get
+    cpu_start = time.process_time()
+    start_time = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if mode == "parallel":
+                responses = await module.http_get_parallel(urls, timeout=timeout, concurrency=concurrency)
+            else:
+                responses = await module.http_get_serial(urls, timeout=timeout)
+    finally:
+        module.http_get = original
+    seconds = time.perf_counter() - start_time
+    cpu_seconds = time.process_time() - cpu_start
+
+    latencies.sort()
+    statuses = [response[0] if isinstance(response, tuple) else response for response in responses]
+    return {
+        "seconds": round(seconds, 4),
+        "throughput_rps": round(len(urls) / seconds, 1) if seconds else None,
+        "p50_ms": round(percentile_ms(latencies, 0.50), 3),
+        "p95_ms": round(percentile_ms(latencies, 0.95), 3),
+        "p99_ms": round(percentile_ms(latencies, 0.99), 3),
+        "cpu_ms_per_request": round(1000 * cpu_seconds / len(urls), 4) if urls else None,
+        "errors": sum(1 for status in statuses if not isinstance(status, int) or status >= 400 or status < 0),
+        "rss_kb": current_rss_kb(),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+async def run_sweep(args) -> List[dict]:
+    results = []
+    async with LocalServer() as server:
+        for backend in args.backends + [f"transport:{name}" for name in args.transports]:
+            if backend == "probe":
+                module = ProbeScript()
+            elif backend.startswith("transport:"):
+                module = TransportScript(backend.partition(":")[2])
+            else:
+                module = load_script(BACKENDS[backend])
+            for count in args.counts:
+                for size in args.sizes:
+                    urls = [server.base_url + args.endpoint.format(size=size, i=i) for i in range(count)]
+                    for mode in args.modes:
+                        # Serial runs ignore concurrency, so run them once per count/size.
+                        for concurrency in (args.concurrency if mode == "parallel" else [1]):
+                            case = {"backend": backend, "mode": mode, "urls": count,
+                                    "concurrency": concurrency, "body_size": size}
+                            case.update(await run_case(module, mode, urls, concurrency, args.timeout))
+                            print(json.dumps(case), file=sys.stderr)
+                            results.append(case)
+            if isinstance(module, TransportScript):
+                await module.transport.aclose()
+    return results
+
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the fetch backends against a local HTTP server.")
+    parser.add_argument("--backends", type=lambda value: value.split(",") if value else [], default=list(BACKENDS),
+                        help=f"comma-separated, from {', '.join(BACKENDS)} and probe")
+    parser.add_argument("--transports", type=lambda value: value.split(",") if value else [],
+                        default=list(TRANSPORTS), help="transports.py backends to run alongside the scripts")
+    parser.add_argument("--modes", type=lambda value: value.split(","), default=["parallel", "serial"])
+    parser.add_argument("--counts", type=int_list, default=[100, 1000])
+    parser.add_argument("--concurrency", type=int_list, default=[10, 100])
+    parser.add_argument("--sizes", type=int_list, default=[0, 10240])
+    parser.add_argument("--endpoint", default="/bytes/{size}",
+                        help="path template; {size} and {i} are filled in, e.g. /delay/5 or /drip/{size}?ms=1")
+    parser.add_argument("--timeout", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=Path("bench_output.json"))
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_sweep(args))
+    report = {"python": platform.python_version(), "platform": platform.platform(),
+              "timestamp": time.time(), "results": results}
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
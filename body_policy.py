@@ -0,0 +1,96 @@
+from typing import Optional, Tuple, Union
+
+import httpx
+
+BODY_NONE = "none"    # drain and discard the body (or send HEAD) - status-only probes
+BODY_BYTES = "bytes"  # raw bytes, read into a caller-supplied reusable buffer
+BODY_HEAD = "head"    # first `limit` raw bytes, then drop the connection's remaining body
+BODY_TEXT = "text"    # decoded str, the old default
+BODY_MODES = (BODY_NONE, BODY_BYTES, BODY_HEAD, BODY_TEXT)
+
+Body = Union[None, str, bytes, memoryview]
+
+
+def check_mode(mode: str):
+    if mode not in BODY_MODES:
+        raise ValueError(f"Unknown body mode {mode!r}, expected one of {BODY_MODES}")
+
+
+def _put(buffer: bytearray, length: int, chunk: bytes) -> Tuple[bytearray, int]:
+    """Write chunk at buffer[length:], growing the buffer (or moving to a bigger one) if it is too small."""
+    end = length + len(chunk)
+    if end > len(buffer):
+        try:
+            buffer.extend(bytes(max(end, 2 * len(buffer)) - len(buffer)))
+        except BufferError:
+            # A memoryview from an earlier call still pins this buffer's size.
+            grown = bytearray(max(end, 2 * len(buffer)))
+            grown[:length] = buffer[:length]
+            buffer = grown
+    buffer[length:end] = chunk
+    return buffer, end
+
+
+async def read_body_aiohttp(response, mode: str = BODY_TEXT, limit: int = 1024,
+                            buffer: Optional[bytearray] = None) -> Body:
+    """Consume an aiohttp response body according to mode.
+
+    In bytes mode the body is written into the front of `buffer` and a
+    memoryview of just the body is returned, so a worker can reuse one buffer
+    across requests without reallocating. The view is overwritten by the next
+    call that reuses the buffer; copy it if it has to live longer.
+    """
+    check_mode(mode)
+    if mode == BODY_TEXT:
+        return await response.text()
+    if mode == BODY_NONE:
+        # Reading to EOF lets aiohttp put the connection back in the keep-alive pool.
+        while await response.content.readany():
+            pass
+        return None
+    if mode == BODY_HEAD:
+        head = bytearray()
+        while len(head) < limit and (chunk := await response.content.read(limit - len(head))):
+            head += chunk
+        if not response.content.at_eof():
+            response.close()
+        return bytes(head)
+    buffer, length = buffer if buffer is not None else bytearray(), 0
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        buffer, length = _put(buffer, length, chunk)
+    return memoryview(buffer)[:length]
+
+
+async def get_with_body(client: httpx.AsyncClient, url: str, mode: str = BODY_TEXT, timeout: int = 15,
+                        limit: int = 1024, buffer: Optional[bytearray] = None,
+                        method: str = "GET") -> Tuple[int, Body]:
+    """Make an httpx request and return (status_code, body) with the body handled according to mode.
+
+    Non-text modes stream the response, so bodies are never decoded and head
+    mode stops after `limit` bytes. Bytes mode reuses `buffer` as described in
+    read_body_aiohttp. In none mode, method="HEAD" skips the body
+    entirely.
+    """
+    check_mode(mode)
+    if mode == BODY_NONE and method == "HEAD":
+        response = await client.head(url, timeout=timeout)
+        return response.status_code, None
+    async with client.stream(method, url, timeout=timeout) as response:
+        if mode == BODY_TEXT:
+            await response.aread()
+            return response.status_code, response.text
+        if mode == BODY_NONE:
+            async for _ in response.aiter_raw():
+                pass
+            return response.status_code, None
+        if mode == BODY_HEAD:
+            head = bytearray()
+            async for chunk in response.aiter_bytes():
+                head += chunk
+                if len(head) >= limit:
+                    break
+            return response.status_code, bytes(head[:limit])
+        buffer, length = buffer if buffer is not None else bytearray(), 0
+        async for chunk in response.aiter_bytes():
+            buffer, length = _put(buffer, length, chunk)
+        return response.status_code, memoryview(buffer)[:length]
@@ -0,0 +1,218 @@
+import aiohttp
+import httpcore
+import httpx
+import socket
+import time
+from aiohttp.abc import AbstractResolver
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+from dns_cache import DnsCache, happy_eyeballs
+from instrumentation import Instrumentation
+
+
+class AiohttpResolver(AbstractResolver):
+    """aiohttp resolver backed by a DnsCache; pass it to TCPConnector(resolver=..., use_dns_cache=False)."""
+
+    def __init__(self, dns: DnsCache):
+        self.dns = dns
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[dict]:
+        addresses = [(address_family, address) for address_family, address in await self.dns.resolve(host)
+                     if family in (socket.AF_UNSPEC, address_family)]
+        if not addresses:
+            raise OSError(f"No address of family {family} for {host}")
+        return [{"hostname": host, "host": address, "port": port, "family": address_family,
+                 "proto": 0, "flags": socket.AI_NUMERICHOST} for address_family, address in addresses]
+
+    async def close(self):
+        pass
+
+
+class HttpcoreBackend(httpcore.AsyncNetworkBackend):
+    """httpcore network backend that connects through a DnsCache with happy eyeballs.
+
+    httpx takes no resolver, so ClientPool installs this on its transport's
+    connection pool. TLS is started later by httpcore against the request's
+    hostname, so connecting by IP here does not affect verification. With an
+    Instrumentation, the lookup is recorded as the "dns" phase.
+    """
+
+    def __init__(self, inner: httpcore.AsyncNetworkBackend, dns: DnsCache, delay: float = 0.25,
+                 instrumentation: Optional[Instrumentation] = None):
+        self.inner = inner
+        self.dns = dns
+        self.delay = delay
+        self.instrumentation = instrumentation
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None, socket_options=None) -> httpcore.AsyncNetworkStream:
+        async def close(stream: httpcore.AsyncNetworkStream):
+            await stream.aclose()
+
+        start_time = time.perf_counter()
+        addresses = await self.dns.resolve(host)
+        if self.instrumentation is not None:
+            self.instrumentation.record("dns", host, time.perf_counter() - start_time)
+        return await happy_eyeballs(host, addresses,
+                                    lambda address: self.inner.connect_tcp(address, port, timeout, local_address,
+                                                                           socket_options),
+                                    close, self.delay)
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options=None) -> httpcore.AsyncNetworkStream:
+        return await self.inner.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float):
+        await self.inner.sleep(seconds)
+
+
+class _CountingTransport(httpx.AsyncHTTPTransport):
+    """httpx transport that reports new TCP connections, and phase timings if enabled, back to its ClientPool."""
+
+    def __init__(self, pool: "ClientPool", **kwargs):
+        super().__init__(**kwargs)
+        self._client_pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._client_pool.requests += 1
+        instrumentation = self._client_pool.instrumentation
+        timing = instrumentation.httpx_trace(request.url.host) if instrumentation is not None else None
+
+        async def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                self._client_pool.new_connections += 1
+            if timing is not None:
+                await timing(event_name, info)
+
+        request.extensions["trace"] = trace
+        return await super().handle_async_request(request)
+
+
+class ClientPool:
+    """Long-lived httpx client and aiohttp session that batch functions borrow instead of opening their own.
+
+    Keeping one client alive across batches lets repeated requests to the same
+    hosts reuse warm keep-alive connections instead of paying TCP and TLS
+    handshakes again. requests, new_connections and reused_connections count
+    traffic through both clients. httpx has no per-host connection cap, so
+    per_host only applies to the aiohttp connector; pair it with the per_host
+    argument of fetch_engine for httpx. http2=True needs the h2 package.
+    Pass an Instrumentation to collect per-phase latency histograms for
+    every request made through the pool. A DnsCache replaces name resolution
+    in both clients: as the aiohttp connector's resolver, and as the network
+    backend of the httpx transport's connection pool.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive: int = 20, per_host: int = 10,
+                 keepalive_expiry: float = 30.0, http2: bool = False,
+                 instrumentation: Optional[Instrumentation] = None, dns: Optional[DnsCache] = None):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.per_host = per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.instrumentation = instrumentation
+        self.dns = dns
+        self.requests = 0
+        self.new_connections = 0
+        self._httpx_client: Optional[httpx.AsyncClient] = None
+        self._httpx_transport: Optional[_CountingTransport] = None
+        self._aiohttp_session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def reused_connections(self) -> int:
+        return self.requests - self.new_connections
+
+    def httpx_client(self) -> httpx.AsyncClient:
+        if self._httpx_client is None:
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_keepalive,
+                                  keepalive_expiry=self.keepalive_expiry)
+            self._httpx_transport = _CountingTransport(self, limits=limits, http2=self.http2)
+            if self.dns is not None:
+                # httpx exposes no resolver option, so swap the backend on its httpcore pool.
+                connection_pool = self._httpx_transport._pool
+                connection_pool._network_backend = HttpcoreBackend(connection_pool._network_backend, self.dns,
+                                                                   instrumentation=self.instrumentation)
+            self._httpx_client = httpx.AsyncClient(transport=self._httpx_transport, http2=self.http2)
+        return self._httpx_client
+
+    def aiohttp_session(self) -> aiohttp.ClientSession:
+        if self._aiohttp_session is None:
+            trace = aiohttp.TraceConfig()
+            trace.on_request_start.append(self._on_aiohttp_request)
+            trace.on_connection_create_end.append(self._on_aiohttp_connect)
+            trace_configs = [trace]
+            if self.instrumentation is not None:
+                trace_configs.append(self.instrumentation.aiohttp_trace_config())
+            resolver = {} if self.dns is None else {"resolver": AiohttpResolver(self.dns), "use_dns_cache": False}
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host,
+                                             keepalive_timeout=self.keepalive_expiry, **resolver)
+            self._aiohttp_session = aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
+        return self._aiohttp_session
+
+    async def _on_aiohttp_request(self, session, context, params):
+        self.requests += 1
+
+    async def _on_aiohttp_connect(self, session, context, params):
+        self.new_connections += 1
+
+    def occupancy(self) -> dict:
+        """Connections open and busy across both clients right now.
+
+        Neither library exposes this publicly, so it is read from httpcore's
+        pool and aiohttp's connector state. Anything a library version lacks
+        counts as 0.
+        """
+        open_connections = busy = 0
+        if self._httpx_transport is not None:
+            connections = getattr(getattr(self._httpx_transport, "_pool", None), "connections", [])
+            open_connections += len(connections)
+            busy += sum(1 for connection in connections if not connection.is_idle())
+        if self._aiohttp_session is not None:
+            connector = self._aiohttp_session.connector
+            acquired = len(getattr(connector, "_acquired", ()))
+            idle = sum(len(connections) for connections in getattr(connector, "_conns", {}).values())
+            open_connections += acquired + idle
+            busy += acquired
+        return {"open": open_connections, "busy": busy}
+
+    def stats(self) -> dict:
+        return {"requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": self.reused_connections}
+
+    async def aclose(self):
+        if self._httpx_client is not None:
+            await self._httpx_client.aclose()
+            self._httpx_client = None
+            self._httpx_transport = None
+        if self._aiohttp_session is not None:
+            await self._aiohttp_session.close()
+            self._aiohttp_session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+
+@asynccontextmanager
+async def borrow_httpx(pool: Optional[ClientPool] = None, **kwargs) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the pool's httpx client, or a throwaway one built from kwargs when no pool is given."""
+    if pool is not None:
+        yield pool.httpx_client()
+        return
+    async with httpx.AsyncClient(**kwargs) as client:
+        yield client
+
+
+@asynccontextmanager
+async def borrow_aiohttp(pool: Optional[ClientPool] = None, **kwargs) -> AsyncIterator[aiohttp.ClientSession]:
+    """Yield the pool's aiohttp session, or a throwaway one built from kwargs when no pool is given."""
+    if pool is not None:
+        yield pool.aiohttp_session()
+        return
+    async with aiohttp.ClientSession(**kwargs) as session:
+        yield session
@@ -2,6 +2,11 @@ import asyncio
 import aiohttp
 import backoff
 import time
+from async_log import log
+from body_policy import BODY_NONE, read_body_aiohttp
+from client_pool import borrow_aiohttp
+from fetch_engine import fetch_bounded
+from raw_http import probe_status
 
 #WORKING
 @backoff.on_exception(backoff.expo,
@@ -11,27 +16,27 @@ import time
 async def http_get(session, url, timeout=15):
     """Make an asynchronous HTTP GET request with timeout and automatic retry."""
     async with session.get(url, timeout=timeout) as response:
-        # text = await response.text()
+        # Status only: drain the body without decoding it so the connection can be reused.
+        await read_body_aiohttp(response, BODY_NONE)
         returnCode = response.status
-        print(f"URL: {url}, Response: {returnCode}")
+        log.debug("response", url=url, status=returnCode)
         return returnCode
 
-async def http_get_parallel(urls, timeout=10):
-    """Make concurrent asynchronous HTTP GET requests with timeout and exception handling."""
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for url in urls:
-            task = asyncio.create_task(http_get(session, url, timeout))
-            tasks.append(task)
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+async def http_get_parallel(urls, timeout=10, concurrency=100, per_host=10, pool=None, flight=None,
+                            grouped=None):
+    """Make bounded concurrent asynchronous HTTP GET requests with timeout and exception handling."""
+    connector = None if pool else aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    async with borrow_aiohttp(pool, connector=connector) as session:
+        responses = await fetch_bounded(urls, lambda url: http_get(session, url, timeout),
+                                        concurrency=concurrency, per_host=per_host, flight=flight,
+                                        grouped=grouped, dns=pool.dns if pool else None)
         return [str(response) if isinstance(response, Exception) else response for response in responses]
 
 #WORKING
-async def http_get_serial(urls, timeout=10):
+async def http_get_serial(urls, timeout=10, pool=None):
     """Make serial asynchronous HTTP GET requests with timeout and exception handling."""
     responses = []
-    async with aiohttp.ClientSession() as session:
+    async with borrow_aiohttp(pool) as session:
         for url in urls:
             try:
                 response = await http_get(session, url, timeout)
@@ -109,5 +114,11 @@ async def test_async():
     serial_duration = time.monotonic() - start_time
     print(f"Serial execution time: {serial_duration} seconds")
 
+    start_time = time.monotonic()
+    print('Trying probeStatus...')
+    await probe_status(urls, timeout=10)
+    probe_duration = time.monotonic() - start_time
+    print(f"Probe execution time: {probe_duration} seconds")
+
 if __name__ == '__main__':
     asyncio.run(test_async(), debug=True)
\ No newline at end of file
@@ -3,6 +3,12 @@ import aiohttp
 import backoff
 import time
 import multiprocessing
+from async_log import log
+from body_policy import BODY_NONE, read_body_aiohttp
+from client_pool import borrow_aiohttp
+from fetch_engine import fetch_bounded
+from sharded_fetch import fetch_multiprocess
+from single_flight import SingleFlight
 
 #WORKING
 @backoff.on_exception(backoff.expo,
@@ -12,27 +18,27 @@ import multiprocessing
 async def http_get(session, url, timeout=15):
     """Make an asynchronous HTTP GET request with timeout and automatic retry."""
     async with session.get(url, timeout=timeout) as response:
-        # text = await response.text()
+        # Status only: drain the body without decoding it so the connection can be reused.
+        await read_body_aiohttp(response, BODY_NONE)
         returnCode = response.status
-        print(f"URL: {url}, Response: {returnCode}")
+        log.debug("response", url=url, status=returnCode)
         return returnCode
 
-async def http_get_parallel(urls, timeout=10):
-    """Make concurrent asynchronous HTTP GET requests with timeout and exception handling."""
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for url in urls:
-            task = asyncio.create_task(http_get(session, url, timeout))
-            tasks.append(task)
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+async def http_get_parallel(urls, timeout=10, concurrency=100, per_host=10, pool=None, flight=None,
+                            grouped=None):
+    """Make bounded concurrent asynchronous HTTP GET requests with timeout and exception handling."""
+    connector = None if pool else aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    async with borrow_aiohttp(pool, connector=connector) as session:
+        responses = await fetch_bounded(urls, lambda url: http_get(session, url, timeout),
+                                        concurrency=concurrency, per_host=per_host, flight=flight,
+                                        grouped=grouped, dns=pool.dns if pool else None)
         return [str(response) if isinstance(response, Exception) else response for response in responses]
 
 #WORKING
-async def http_get_serial(urls, timeout=10):
+async def http_get_serial(urls, timeout=10, pool=None):
     """Make serial asynchronous HTTP GET requests with timeout and exception handling."""
     responses = []
-    async with aiohttp.ClientSession() as session:
+    async with borrow_aiohttp(pool) as session:
         for url in urls:
             try:
                 response = await http_get(session, url, timeout)
@@ -46,12 +52,15 @@ async def http_get_serial(urls, timeout=10):
 async def run_async_tasks(urls, timeout=10):
     start_time = time.monotonic()
     print('Trying httpGetParallel...')
-    await http_get_parallel(urls, timeout=timeout)
+    flight = SingleFlight()
+    responses = await http_get_parallel(urls, timeout=timeout, flight=flight)
     parallel_duration = time.monotonic() - start_time
     print(f"Parallel execution time: {parallel_duration} seconds")
+    print(f"Deduplicated requests: {flight.deduplicated}")
+    return responses
 
 def run_parallel(urls, timeout=10):
-    asyncio.run(run_async_tasks(urls, timeout=timeout))
+    return asyncio.run(run_async_tasks(urls, timeout=timeout))
 
 if __name__ == '__main__':
     urls = [
@@ -108,15 +117,12 @@ if __name__ == '__main__':
     ]
 
     num_processes = multiprocessing.cpu_count()
-    chunk_size = len(urls) // num_processes
-    print(f"num_processes: {num_processes}, chunk_size: {chunk_size}")
-    url_chunks = [urls[i:i + chunk_size] for i in range(0, len(urls), chunk_size)]
+    print(f"num_processes: {num_processes}")
 
-    processes = []
-    for chunk in url_chunks:
-        process = multiprocessing.Process(target=run_parallel, args=(chunk, 10))
-        processes.append(process)
-        process.start()
-
-    for process in processes:
-        process.join()
\ No newline at end of file
+    start_time = time.monotonic()
+    print('Trying fetchMultiprocess...')
+    results = list(fetch_multiprocess(urls, timeout=10, processes=num_processes, batch_size=5))
+    print(f"Multiprocess execution time: {time.monotonic() - start_time} seconds")
+    for index, url, status, _ in results:
+        log.info("response", index=index, url=url, status=status)
+    log.close()
@@ -1,8 +1,10 @@
 import asyncio
-import aiohttp
 import backoff
 import time
 import httpx
+from body_policy import BODY_NONE, get_with_body
+from client_pool import ClientPool, borrow_httpx
+from fetch_engine import fetch_bounded
 
 # @backoff.on_exception(backoff.expo,
 #                       aiohttp.ClientError,
@@ -34,29 +36,19 @@ import httpx
                        max_time=60)
 async def http_get(client, url, timeout=15):
     try:
-        response = await client.get(url, timeout=timeout)
-        return response.status_code
+        status_code, _ = await get_with_body(client, url, BODY_NONE, timeout)
+        return status_code
     except httpx.TimeoutException:
         return f"TimeoutError: Request to {url} timed out."
 
 #HTTPX
-async def http_get_parallel(urls, timeout=10):
-    async with httpx.AsyncClient() as client:
-        async with asyncio.TaskGroup() as tg:
-            tasks = []
-            for url in urls:
-                task = tg.create_task(http_get(client, url, timeout))
-                tasks.append(task)
-
-            responses = []
-            for task in tasks:
-                try:
-                    response = await task
-                    responses.append(response)
-                except Exception as e:
-                    responses.append(f"Error: {str(e)}")
-
-        return responses
+async def http_get_parallel(urls, timeout=10, concurrency=100, per_host=10, pool=None, grouped=None):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with borrow_httpx(pool, limits=limits) as client:
+        responses = await fetch_bounded(urls, lambda url: http_get(client, url, timeout),
+                                        concurrency=concurrency, per_host=per_host, grouped=grouped,
+                                        dns=pool.dns if pool else None)
+        return [f"Error: {str(response)}" if isinstance(response, Exception) else response for response in responses]
 
 #USING TaskGroups
 # async def http_get_parallel(urls, timeout=10):
@@ -90,14 +82,14 @@ async def http_get_parallel(urls, timeout=10):
 #             responses.append(response)
 #         return responses
 
-async def http_get_serial(urls, timeout=10):
+async def http_get_serial(urls, timeout=10, pool=None):
     responses = []
-    async with aiohttp.ClientSession() as session:
+    async with borrow_httpx(pool) as client:
         for url in urls:
             try:
-                response = await http_get(session, url, timeout)
+                response = await http_get(client, url, timeout)
                 responses.append(response)
-            except asyncio.TimeoutError:
+            except httpx.TimeoutException:
                 responses.append(f"TimeoutError: Request to {url} timed out.")
             except Exception as e:
                 responses.append(f"Error: An error occurred while requesting {url}. Error: {str(e)}")
@@ -157,17 +149,22 @@ async def test_async():
 'https://httpbin.org/delay/10',
     ]
 
+    pool = ClientPool()
+
     start_time = time.monotonic()
     print('Trying httpGetParallel...')
-    await http_get_parallel(urls, timeout=10)
+    await http_get_parallel(urls, timeout=10, pool=pool)
     parallel_duration = time.monotonic() - start_time
     print(f"Parallel execution time: {parallel_duration} seconds")
 
     start_time = time.monotonic()
     print('Trying httpGetSerial...')
-    await http_get_serial(urls, timeout=10)
+    await http_get_serial(urls, timeout=10, pool=pool)
     serial_duration = time.monotonic() - start_time
     print(f"Serial execution time: {serial_duration} seconds")
 
+    print(f"Connection pool: {pool.stats()}")
+    await pool.aclose()
+
 if __name__ == '__main__':
     asyncio.run(test_async())
\ No newline at end of file
@@ -2,7 +2,12 @@ import asyncio
 import httpx
 import backoff
 import time
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
+from adaptive_limit import AdaptiveLimiter
+from client_pool import ClientPool, borrow_httpx
+from fetch_engine import fetch_bounded
+from scheduler import NORMAL, FairScheduler
+from single_flight import SingleFlight
 
 @backoff.on_exception(backoff.expo, (httpx.TimeoutException, httpx.HTTPStatusError), max_tries=5, max_time=60)
 
@@ -13,27 +18,29 @@ async def http_get(client, url: str, timeout: int = 15) -> Tuple[Union[int, str]
     except httpx.TimeoutException:
         return f"TimeoutError: Request to {url} timed out.", ""
 
-async def http_get_parallel(urls: List[str], timeout: int = 10) -> List[Tuple[Union[int, str], str]]:
-    async with httpx.AsyncClient() as client:
-        async with asyncio.TaskGroup() as tg:
-            tasks = []
-            for url in urls:
-                task = tg.create_task(http_get(client, url, timeout))
-                tasks.append(task)
+async def http_get_parallel(urls: List[str], timeout: int = 10, concurrency: int = 100, per_host: int = 10,
+                            pool: Optional[ClientPool] = None,
+                            flight: Optional[SingleFlight] = None,
+                            limiter: Optional[AdaptiveLimiter] = None,
+                            scheduler: Optional[FairScheduler] = None, tenant: str = "default",
+                            priority: int = NORMAL,
+                            grouped: Optional[bool] = None) -> List[Tuple[Union[int, str], str]]:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with borrow_httpx(pool, limits=limits) as client:
+        def fetch(url: str):
+            if scheduler is None:
+                return http_get(client, url, timeout)
+            return scheduler.fetch(url, tenant, priority, fetch=lambda url: http_get(client, url, timeout))
 
-            responses = []
-            for task in tasks:
-                try:
-                    response = await task
-                    responses.append(response)
-                except Exception as e:
-                    responses.append((f"Error: {str(e)}", ""))
+        responses = await fetch_bounded(urls, fetch,
+                                        concurrency=concurrency, per_host=per_host, flight=flight,
+                                        limiter=limiter, grouped=grouped, dns=pool.dns if pool else None)
+        return [(f"Error: {str(response)}", "") if isinstance(response, Exception) else response for response in responses]
 
-        return responses
-
-async def http_get_serial(urls: List[str], timeout: int = 10) -> List[Tuple[Union[int, str], str]]:
+async def http_get_serial(urls: List[str], timeout: int = 10,
+                          pool: Optional[ClientPool] = None) -> List[Tuple[Union[int, str], str]]:
     responses = []
-    async with httpx.AsyncClient() as client:
+    async with borrow_httpx(pool) as client:
         for url in urls:
             try:
                 response = await http_get(client, url, timeout)
@@ -98,9 +105,11 @@ async def test_async():
             'https://httpbin.org/delay/10',
             ]
 
+    pool = ClientPool()
+
     start_time = time.monotonic()
     print('Trying httpGetParallel...')
-    parallel_responses = await http_get_parallel(urls, timeout=10)
+    parallel_responses = await http_get_parallel(urls, timeout=10, pool=pool)
     parallel_duration = time.monotonic() - start_time
     print(f"Parallel execution time: {parallel_duration} seconds")
     print("Parallel responses:")
@@ -109,12 +118,15 @@ async def test_async():
 
     start_time = time.monotonic()
     print('Trying httpGetSerial...')
-    serial_responses = await http_get_serial(urls, timeout=10)
+    serial_responses = await http_get_serial(urls, timeout=10, pool=pool)
     serial_duration = time.monotonic() - start_time
     print(f"Serial execution time: {serial_duration} seconds")
     print("Serial responses:")
     for response in serial_responses:
         print(f"Status Code: {response[0]}, Response Text: {response[1]}")
 
+    print(f"Connection pool: {pool.stats()}")
+    await pool.aclose()
+
 if __name__ == '__main__':
     asyncio.run(test_async())
\ No newline at end of file
@@ -2,18 +2,24 @@ import asyncio
 import httpx
 import backoff
 import time
-import json
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Tuple
 from pathlib import Path
 from datetime import datetime, timezone
+from client_pool import ClientPool, borrow_httpx
+from deadline import Deadline, DeadlineExceeded, call_with_deadline, fetch_within
+from http_stream import http_get_stream
+from job_journal import JobJournal
+from single_flight import SingleFlight
+from ndjson_sink import NdjsonWriter
+from result_store import ResultStore
 
 @backoff.on_exception(backoff.expo, (httpx.TimeoutException, httpx.HTTPStatusError), max_tries=5, max_time=60)
     
 async def http_get(client, url: str, timeout: int = 15) -> Tuple[int, str, float, str, datetime]:
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
         response = await client.get(url, timeout=timeout)
-        end_time = time.time()
+        end_time = time.perf_counter()
         response_time = end_time - start_time
         timestamp = datetime.now(timezone.utc)
         return response.status_code, response.text, response_time, url, timestamp
@@ -22,6 +28,19 @@ async def http_get(client, url: str, timeout: int = 15) -> Tuple[int, str, float
         timestamp = datetime.now(timezone.utc)
         return -1, f"TimeoutError: Request to {url} timed out.", response_time, url, timestamp
 
+async def http_get_deadline(client, url: str, deadline: Deadline,
+                            timeout: float = 15) -> Tuple[int, str, float, str, datetime]:
+    """Like http_get, but connect, read and retries all fit inside `deadline` instead of backoff's max_time."""
+    start_time = time.perf_counter()
+    try:
+        response = await call_with_deadline(lambda attempt_timeout: client.get(url, timeout=attempt_timeout),
+                                            deadline, retry_on=(httpx.TransportError,), cap=timeout)
+        return (response.status_code, response.text, time.perf_counter() - start_time, url,
+                datetime.now(timezone.utc))
+    except (httpx.TimeoutException, DeadlineExceeded):
+        return (-1, f"TimeoutError: Request to {url} timed out.", time.perf_counter() - start_time, url,
+                datetime.now(timezone.utc))
+
 # async def http_get_parallel(urls: List[str], timeout: int = 10) -> List[Tuple[int, str, float, str]]:
 #     async with httpx.AsyncClient() as client:
 #         async with asyncio.TaskGroup() as tg:
@@ -40,37 +59,45 @@ async def http_get(client, url: str, timeout: int = 15) -> Tuple[int, str, float
 
 #         return responses
     
-async def http_get_parallel(urls: List[str], timeout: int = 10) -> List[Tuple[int, str, float, str]]:
-    async with httpx.AsyncClient() as client:
-        timeout_groups = [(5, []), (8, []), (12, [])]  # Define timeout groups
+async def http_get_parallel(urls: List[str], timeout: int = 10, concurrency: int = 100, per_host: int = 10,
+                            pool: Optional[ClientPool] = None,
+                            flight: Optional[SingleFlight] = None,
+                            budget: float = 30,
+                            grouped: bool = True) -> List[Tuple[int, str, float, str]]:
+    """Fetch urls in parallel, in input order, with the whole batch capped at `budget` seconds.
 
-        # Distribute URLs among the timeout groups
+    URLs are still spread over the 5/8/12 second timeout groups. The groups
+    now run together under one shared deadline instead of one after another.
+    URLs still unfinished at the deadline come back as -1 timeout rows.
+    """
+    limits = httpx.Limits(max_connections=concurrency)
+    async with borrow_httpx(pool, limits=limits) as client:
+        timeout_groups = (5, 8, 12)  # Per-request timeout caps, assigned round-robin
+        url_timeouts = {}
         for i, url in enumerate(urls):
-            group_index = i % len(timeout_groups)
-            timeout_groups[group_index][1].append(url)
+            url_timeouts.setdefault(url, timeout_groups[i % len(timeout_groups)])
 
+        responses = await fetch_within(urls, lambda url, deadline: http_get_deadline(client, url, deadline,
+                                                                                     url_timeouts[url]),
+                                       budget, concurrency=concurrency, per_host=per_host, flight=flight,
+                                       grouped=grouped, dns=pool.dns if pool else None)
         results = []
-
-        for timeout, group_urls in timeout_groups:
-            async with asyncio.TaskGroup() as tg:
-                tasks = []
-                for url in group_urls:
-                    task = tg.create_task(http_get(client, url, timeout))
-                    tasks.append(task)
-
-                for task in tasks:
-                    try:
-                        response = await task
-                        results.append(response)
-                    except Exception as e:
-                        results.append((-1, f"Error: {str(e)}", 0.0, ""))
+        for url, response in zip(urls, responses):
+            if isinstance(response, DeadlineExceeded):
+                results.append((-1, f"TimeoutError: Request to {url} timed out.", float(budget), url,
+                                datetime.now(timezone.utc)))
+            elif isinstance(response, Exception):
+                results.append((-1, f"Error: {str(response)}", 0.0, ""))
+            else:
+                results.append(response)
 
         return results
 
 
-async def http_get_serial(urls: List[str], timeout: int = 10) -> List[Tuple[int, str, float, str]]:
+async def http_get_serial(urls: List[str], timeout: int = 10,
+                          pool: Optional[ClientPool] = None) -> List[Tuple[int, str, float, str]]:
     responses = []
-    async with httpx.AsyncClient() as client:
+    async with borrow_httpx(pool) as client:
         for url in urls:
             try:
                 response = await http_get(client, url, timeout)
@@ -82,31 +109,90 @@ async def http_get_serial(urls: List[str], timeout: int = 10) -> List[Tuple[int,
                 responses.append((-1, f"Error: An error occurred while requesting {url}. Error: {str(e)}", 0.0, url))
     return responses
 
-def save_to_json(responses: List[Tuple[int, str, float, str, datetime]], output_path: Path):
-    data = []
-    for response in responses:
-        status_code, response_text, response_time, url, timestamp = response
-        data.append({
-            "timestamp": timestamp.isoformat(),
-            "status_code": status_code,
-            "url": url,
-            "response_time": round(response_time, 2),
-            "response_body": response_text
-        })
+async def http_get_store(urls: List[str], timeout: int = 10) -> ResultStore:
+    """Fetch urls in parallel into a columnar ResultStore, in input order, instead of a list of tuples."""
+    store = ResultStore()
+    async for record in http_get_stream(urls, timeout=timeout, ordered=True):
+        store.append(record.status, record.body, record.elapsed, record.url)
+    return store
+
+def save_to_json(responses: Iterable[Tuple[int, str, float, str, datetime]], output_path: Path,
+                 max_bytes: Optional[int] = None):
+    """Write each response as one JSON line, without building the whole document in memory."""
+    try:
+        with NdjsonWriter(output_path, max_bytes=max_bytes) as writer:
+            for status_code, response_text, response_time, url, timestamp in responses:
+                writer.write({
+                    "timestamp": timestamp.isoformat(),
+                    "status_code": status_code,
+                    "url": url,
+                    "response_time": round(response_time, 2),
+                    "response_body": response_text
+                })
+    except IOError as e:
+        print(f"Error writing to file {output_path}: {str(e)}")
 
+async def stream_to_json(urls: List[str], output_path: Path, timeout: int = 10,
+                         max_bytes: Optional[int] = None) -> int:
+    """Fetch urls in parallel and append each response to output_path as soon as it completes."""
     try:
-        with output_path.open("w") as f:
-            json.dump(data, f, indent=2)
+        with NdjsonWriter(output_path, max_bytes=max_bytes) as writer:
+            async for record in http_get_stream(urls, timeout=timeout):
+                writer.write({
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "status_code": record.status,
+                    "url": record.url,
+                    "response_time": round(record.elapsed, 2),
+                    "response_body": record.body
+                })
+            return writer.records_written
+    except IOError as e:
+        print(f"Error writing to file {output_path}: {str(e)}")
+        return 0
+
+async def resume_to_json(urls: Iterable[str], output_path: Path, journal_path: Path, timeout: int = 10,
+                         max_bytes: Optional[int] = None) -> int:
+    """Crash-safe stream_to_json: rerun with the same arguments after a crash to fetch only what is left.
+
+    Finished URL indexes and the file/offset of their lines go into a
+    JobJournal, and the output is appended to rather than truncated. Requests
+    that failed with status -1 are written but not journaled, so a resumed run
+    retries them. Readers should take the last line per "index". Returns how
+    many URLs are finished overall.
+    """
+    try:
+        with NdjsonWriter(output_path, max_bytes=max_bytes, append=True) as writer, \
+                JobJournal(journal_path, before_commit=writer.flush) as journal:
+            positions = {}
+
+            def pending_urls():
+                for position, (index, url) in enumerate(journal.remaining(urls)):
+                    positions[position] = index
+                    yield url
+
+            async for record in http_get_stream(pending_urls(), timeout=timeout):
+                index = positions.pop(record.index)
+                location, offset = writer.write({
+                    "index": index,
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "status_code": record.status,
+                    "url": record.url,
+                    "response_time": round(record.elapsed, 2),
+                    "response_body": record.body
+                })
+                if record.status != -1:
+                    journal.record(index, record.url, record.status, location, offset)
+            return journal.completed()
     except IOError as e:
         print(f"Error writing to file {output_path}: {str(e)}")
+        return 0
 
 async def test_async(parallel_output: Path, serial_output: Path, timeout: int):
     start_time = time.monotonic()
     print('Trying httpGetParallel...')
-    parallel_responses = await http_get_parallel(urls, timeout=timeout)
+    await stream_to_json(urls, parallel_output, timeout=timeout)
     parallel_duration = time.monotonic() - start_time
     print(f"Parallel execution time: {parallel_duration} seconds")
-    save_to_json(parallel_responses, parallel_output)
 
     start_time = time.monotonic()
     print('Trying httpGetSerial...')
@@ -169,8 +255,8 @@ if __name__ == '__main__':
             'https://httpbin.org/delay/10',
     ]
 
-    parallel_output = Path('http_get_parallel.json')
-    serial_output = Path('http_get_serial.json')
+    parallel_output = Path('http_get_parallel.ndjson')
+    serial_output = Path('http_get_serial.ndjson')
     timeout = 10
 
     asyncio.run(test_async(parallel_output, serial_output, timeout))
\ No newline at end of file
@@ -82,6 +82,9 @@ import backoff
 import time
 import api
 import httpx
+from client_pool import borrow_aiohttp
+from fetch_engine import fetch_bounded
+from scheduler import NORMAL
 
 # async def http_get(session, url, timeout=5):
 #     """Make an asynchronous HTTP GET request with timeout."""
@@ -150,15 +153,23 @@ async def http_get(session, url, timeout=15):
 #             return await response.text()
 
 
-async def http_get_parallel(urls, timeout=10):
-    """Make concurrent asynchronous HTTP GET requests with timeout and exception handling."""
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        for url in urls:
-            task = asyncio.create_task(http_get(session, url, timeout))
-            tasks.append(task)
+async def http_get_parallel(urls, timeout=10, concurrency=100, per_host=10, pool=None, flight=None,
+                            scheduler=None, tenant="default", priority=NORMAL, grouped=None):
+    """Make bounded concurrent asynchronous HTTP GET requests with timeout and exception handling.
+
+    With a shared scheduler.FairScheduler, every request waits its turn there
+    as tenant at the given priority, so concurrent callers share it fairly.
+    """
+    connector = None if pool else aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    async with borrow_aiohttp(pool, connector=connector) as session:
+        def fetch(url):
+            if scheduler is None:
+                return http_get(session, url, timeout)
+            return scheduler.fetch(url, tenant, priority, fetch=lambda url: http_get(session, url, timeout))
 
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        responses = await fetch_bounded(urls, fetch,
+                                        concurrency=concurrency, per_host=per_host, flight=flight,
+                                        grouped=grouped, dns=pool.dns if pool else None)
         return [str(response) if isinstance(response, Exception) else response for response in responses]
 
 #WORKING
@@ -216,10 +227,10 @@ async def http_get_parallel(urls, timeout=10):
 #     return responses
 
 #WORKING
-async def http_get_serial(urls, timeout=10):
+async def http_get_serial(urls, timeout=10, pool=None):
     """Make serial asynchronous HTTP GET requests with timeout and exception handling."""
     responses = []
-    async with aiohttp.ClientSession() as session:
+    async with borrow_aiohttp(pool) as session:
         for url in urls:
             try:
                 response = await http_get(session, url, timeout)
@@ -0,0 +1,104 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple, Type
+from adaptive_limit import AdaptiveLimiter
+from dns_cache import DnsCache
+from fetch_engine import plan_by_origin, stream_bounded
+from single_flight import SingleFlight
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised, or returned in place of a result, for work the deadline cut off."""
+
+
+class Deadline:
+    """An absolute point in time, measured on the monotonic clock, that a request or batch must finish by."""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Return the timeout for the next connect/read: the time left, capped at `cap`."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+
+async def call_with_deadline(attempt: Callable[[float], Awaitable[Any]],
+                             deadline: Deadline,
+                             retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+                             cap: Optional[float] = None,
+                             max_tries: int = 5,
+                             base_delay: float = 0.5,
+                             max_delay: float = 10.0,
+                             min_attempt: float = 0.05) -> Any:
+    """Call attempt(timeout) with retries, and never run past `deadline`.
+
+    Each attempt is passed min(cap, time left) to use as its connect/read
+    timeout, and is cancelled outright if it is still running at the deadline.
+    A retry only happens if its full-jitter backoff delay plus `min_attempt`
+    still fits in the time left; otherwise the last error is raised as is.
+    DeadlineExceeded is raised once there is no time left for an attempt.
+    """
+    tries = 0
+    while True:
+        tries += 1
+        remaining = deadline.remaining()
+        if remaining <= min_attempt:
+            raise DeadlineExceeded(f"Deadline of {deadline.budget}s exceeded")
+        try:
+            return await asyncio.wait_for(attempt(deadline.timeout(cap)), remaining)
+        except asyncio.TimeoutError as e:
+            if deadline.expired():
+                raise DeadlineExceeded(f"Deadline of {deadline.budget}s exceeded") from e
+            error = e
+        except retry_on as e:
+            error = e
+        delay = random.uniform(0, min(max_delay, base_delay * 2 ** (tries - 1)))
+        if tries >= max_tries or delay + min_attempt >= deadline.remaining():
+            raise error
+        await asyncio.sleep(delay)
+
+
+async def fetch_within(urls: Iterable[str],
+                       fetch: Callable[[str, Deadline], Awaitable[Any]],
+                       budget: float,
+                       concurrency: int = 100,
+                       per_host: int = 10,
+                       flight: Optional[SingleFlight] = None,
+                       limiter: Optional[AdaptiveLimiter] = None,
+                       grouped: bool = False,
+                       dns: Optional[DnsCache] = None) -> List[Any]:
+    """Run fetch(url, deadline) for every URL and return in-order results once all finish or `budget` seconds pass.
+
+    Every request shares the same Deadline, so it can size its own timeouts
+    and retries from the time that is left. When the budget runs out, the
+    requests still running are cancelled. URLs not finished by then get a
+    DeadlineExceeded in place of their result, so the batch never takes much
+    longer than `budget`. Other exceptions are returned in place of results,
+    as in fetch_bounded, grouped=True dispatches in plan_by_origin order, and a
+    DnsCache pre-resolves hosts as in stream_bounded.
+    """
+    urls = list(urls)
+    order = plan_by_origin(urls, per_host) if grouped else range(len(urls))
+    deadline = Deadline(budget)
+    results: List[Any] = [DeadlineExceeded(f"Request to {url} did not finish within {budget}s") for url in urls]
+
+    async def collect():
+        async for index, _, result in stream_bounded([urls[i] for i in order], lambda url: fetch(url, deadline),
+                                                     concurrency=concurrency, per_host=per_host,
+                                                     flight=flight, limiter=limiter, dns=dns):
+            results[order[index]] = result
+
+    try:
+        await asyncio.wait_for(collect(), deadline.remaining())
+    except asyncio.TimeoutError:
+        pass
+    return results
@@ -0,0 +1,174 @@
+import asyncio
+import ipaddress
+import socket
+import ssl as ssl_module
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from single_flight import SingleFlight
+
+Address = Tuple[int, str]
+
+
+def _literal(host: str) -> Optional[Address]:
+    try:
+        ip = ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return None
+    return (socket.AF_INET6 if ip.version == 6 else socket.AF_INET), str(ip)
+
+
+def _interleave(addresses: List[Address]) -> List[Address]:
+    """Alternate address families, starting with the first family returned (RFC 8305 section 4)."""
+    if not addresses:
+        return addresses
+    first = [address for address in addresses if address[0] == addresses[0][0]]
+    other = [address for address in addresses if address[0] != addresses[0][0]]
+    ordered = []
+    for index in range(max(len(first), len(other))):
+        ordered.extend(group[index] for group in (first, other) if index < len(group))
+    return ordered
+
+
+class DnsCache:
+    """Shared host-to-address cache that keeps name resolution off the per-request path.
+
+    The stdlib resolver is getaddrinfo on the loop's thread pool. Here each
+    host is looked up once per `ttl` seconds, and concurrent lookups of the
+    same host share one call. prefetch() resolves every distinct host of a
+    batch before fan-out. getaddrinfo does not report record TTLs, so `ttl`
+    is a fixed cap. Failures are cached for `negative_ttl` seconds so a dead
+    host does not tie up the thread pool. `overrides` pins hosts to fixed
+    addresses or other hostnames, e.g. {"httpbin.org": ["127.0.0.1"]} to aim
+    a run at a bench_local.LocalServer.
+    """
+
+    def __init__(self, ttl: float = 60.0, negative_ttl: float = 5.0,
+                 overrides: Optional[Dict[str, List[str]]] = None, family: int = socket.AF_UNSPEC):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.family = family
+        self.overrides: Dict[str, List[str]] = {}
+        for host, addresses in (overrides or {}).items():
+            self.override(host, *addresses)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Tuple[float, Union[List[Address], OSError]]] = {}
+        self._flight = SingleFlight()
+
+    def override(self, host: str, *targets: str):
+        """Pin host to the given IP addresses or hostnames, or remove its override when none are given.
+
+        Hostname targets are resolved through the cache when host is looked up.
+        """
+        if targets:
+            for target in targets:
+                if not isinstance(target, str) or not target:
+                    raise ValueError(f"Override for {host} must be an IP address or hostname, got {target!r}")
+            self.overrides[host] = list(targets)
+        else:
+            self.overrides.pop(host, None)
+
+    async def resolve(self, host: str) -> List[Address]:
+        """Return (family, ip) pairs for host, interleaved by family for happy-eyeballs connects."""
+        targets = self.overrides.get(host)
+        if targets is None:
+            return await self._resolve(host)
+        addresses: List[Address] = []
+        for target in targets:
+            addresses.extend(await self._resolve(target))
+        return _interleave(list(dict.fromkeys(addresses)))
+
+    async def _resolve(self, host: str) -> List[Address]:
+        literal = _literal(host)
+        if literal is not None:
+            return [literal]
+        entry = self._entries.get(host)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            result = entry[1]
+        else:
+            self.misses += 1
+            result = await self._flight.do(host, lambda: self._lookup(host))
+        if isinstance(result, OSError):
+            raise result
+        return result
+
+    async def _lookup(self, host: str) -> Union[List[Address], OSError]:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, family=self.family,
+                                                                  type=socket.SOCK_STREAM)
+        except OSError as e:
+            self._entries[host] = (time.monotonic() + self.negative_ttl, e)
+            return e
+        addresses = list(dict.fromkeys((family, sockaddr[0]) for family, _, _, _, sockaddr in infos))
+        addresses = _interleave(addresses)
+        self._entries[host] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    async def prefetch(self, urls: Iterable[str]) -> int:
+        """Resolve every distinct host in urls concurrently and return how many there were."""
+        hosts = {urlsplit(url).hostname for url in urls} - {None}
+        await asyncio.gather(*(self.resolve(host) for host in hosts), return_exceptions=True)
+        return len(hosts)
+
+    def stats(self) -> dict:
+        return {"hosts": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+async def happy_eyeballs(host: str, addresses: List[Address], connect: Callable[[str], Awaitable[Any]],
+                         close: Callable[[Any], Awaitable[None]], delay: float = 0.25) -> Any:
+    """Race connect(ip) across addresses as RFC 8305 describes and return the first connection made.
+
+    Addresses are tried in order (interleaved by family). The next attempt
+    starts when the previous one fails, or after `delay` seconds without an
+    answer, whichever comes first. Attempts still running are cancelled, and
+    extra connections that also succeeded are passed to close().
+    """
+    remaining = list(addresses)
+    pending = set()
+    errors: List[BaseException] = []
+    losers = []
+    winner = None
+    try:
+        while winner is None and (remaining or pending):
+            if remaining:
+                _, address = remaining.pop(0)
+                pending.add(asyncio.create_task(connect(address)))
+            done, pending = await asyncio.wait(pending, timeout=delay if remaining else None,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                elif winner is None:
+                    winner = task.result()
+                else:
+                    losers.append(task.result())
+    finally:
+        for task in pending:
+            task.cancel()
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if not isinstance(result, BaseException):
+                losers.append(result)
+        for loser in losers:
+            await close(loser)
+    if winner is None:
+        if len(errors) == 1:
+            raise errors[0]
+        raise OSError(f"Multiple exceptions connecting to {host}: {', '.join(str(e) for e in errors)}")
+    return winner
+
+
+async def open_connection(host: str, port: int, dns: DnsCache, ssl: Optional[ssl_module.SSLContext] = None,
+                          delay: float = 0.25) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Open asyncio streams to host through the DNS cache with happy eyeballs; TLS is verified against host."""
+    server_hostname = host if ssl is not None else None
+
+    async def close(streams):
+        streams[1].close()
+
+    return await happy_eyeballs(host, await dns.resolve(host),
+                                lambda address: asyncio.open_connection(address, port, ssl=ssl,
+                                                                        server_hostname=server_hostname),
+                                close, delay)
@@ -0,0 +1,254 @@
+import asyncio
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from adaptive_limit import AdaptiveLimiter, is_failure
+from dns_cache import DnsCache
+from single_flight import SingleFlight
+
+
+def host_of(url: str) -> str:
+    """Return the host[:port] part of a URL, used as the per-host key."""
+    return urlsplit(url).netloc
+
+
+def plan_by_origin(urls: List[str], per_host: int = 10) -> List[int]:
+    """Return a dispatch order (indexes into urls) that groups URLs by origin and balances across origins.
+
+    Origins are visited round-robin, largest first, taking `per_host` URLs
+    from each per turn. Each turn then fills exactly one origin's per-host
+    slots, so workers rarely sit blocked on a saturated host and requests to
+    an origin arrive back to back on its warm keep-alive connections. The
+    biggest origins start first, so they do not become the batch's long tail.
+    Duplicate URLs end up adjacent, which also helps a SingleFlight.
+    """
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for index, url in enumerate(urls):
+        parts = urlsplit(url)
+        groups.setdefault((parts.scheme, parts.netloc), []).append(index)
+    queues = sorted(groups.values(), key=len, reverse=True)
+    order: List[int] = []
+    start = 0
+    while queues:
+        for queue in queues:
+            order.extend(queue[start:start + per_host])
+        start += per_host
+        queues = [queue for queue in queues if len(queue) > start]
+    return order
+
+
+class HostLimiter:
+    """Cap the number of in-flight requests per host.
+
+    Semaphores are created on first use and dropped again once a host has no
+    requests in flight, so the table only holds hosts that are currently busy.
+    """
+
+    def __init__(self, per_host: int = 10):
+        self.per_host = per_host
+        self._slots: Dict[str, Tuple[asyncio.Semaphore, int]] = {}
+
+    async def acquire(self, host: str):
+        semaphore, users = self._slots.get(host, (None, 0))
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host)
+        self._slots[host] = (semaphore, users + 1)
+        try:
+            await semaphore.acquire()
+        except BaseException:
+            self._forget(host)
+            raise
+
+    def release(self, host: str):
+        semaphore, _ = self._slots[host]
+        semaphore.release()
+        self._forget(host)
+
+    def _forget(self, host: str):
+        semaphore, users = self._slots[host]
+        if users <= 1:
+            del self._slots[host]
+        else:
+            self._slots[host] = (semaphore, users - 1)
+
+
+async def _enumerate(urls: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[Tuple[int, str]]:
+    if hasattr(urls, "__aiter__"):
+        index = 0
+        async for url in urls:
+            yield index, url
+            index += 1
+    else:
+        for item in enumerate(urls):
+            yield item
+
+
+async def _windows(urls: Union[Iterable[str], AsyncIterable[str]], size: int) -> AsyncIterator[List[str]]:
+    window: List[str] = []
+    async for _, url in _enumerate(urls):
+        window.append(url)
+        if len(window) == size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+async def _grouped(urls: Union[Iterable[str], AsyncIterable[str]], per_host: int, size: int,
+                   origins: Dict[int, int]) -> AsyncIterator[str]:
+    """Yield urls in plan_by_origin order, `size` at a time, recording each one's input index in origins."""
+    base = 0
+    position = 0
+    async for window in _windows(urls, size):
+        for index in plan_by_origin(window, per_host):
+            origins[position] = base + index
+            position += 1
+            yield window[index]
+        base += len(window)
+
+
+async def stream_bounded(urls: Union[Iterable[str], AsyncIterable[str]],
+                         fetch: Callable[[str], Awaitable[Any]],
+                         concurrency: int = 100,
+                         per_host: int = 10,
+                         ordered: bool = False,
+                         window: Optional[int] = None,
+                         flight: Optional[SingleFlight] = None,
+                         limiter: Optional[AdaptiveLimiter] = None,
+                         dns: Optional[DnsCache] = None) -> AsyncIterator[Tuple[int, str, Any]]:
+    """Run fetch(url) on a fixed pool of workers and yield (index, url, result) as each one completes.
+
+    With ordered=True records are yielded in input order through a reorder
+    buffer holding at most `window` records (default 2 * concurrency); the
+    producer stops handing out URLs while the buffer is full. With a
+    SingleFlight, duplicate URLs in flight at the same time share one request
+    and do not take a per-host slot. With an AdaptiveLimiter, each host's cap
+    follows the limiter instead of the fixed `per_host`. Exceptions are yielded
+    in place of results. `urls` may be any iterable or async iterable (see
+    url_sources) and is consumed lazily. With a DnsCache, the producer starts
+    resolving each new host as soon as it reads the host's first URL, so
+    lookups overlap instead of stalling workers at connect time.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    done: asyncio.Queue = asyncio.Queue()
+    hosts = HostLimiter(per_host)
+    slots = asyncio.Semaphore(window or concurrency * 2) if ordered else None
+    seen_hosts = set()
+    lookups = set()
+
+    async def produce():
+        try:
+            async for index, url in _enumerate(urls):
+                if dns is not None and (hostname := urlsplit(url).hostname) not in seen_hosts:
+                    seen_hosts.add(hostname)
+                    lookup = asyncio.ensure_future(dns.prefetch((url,)))
+                    lookups.add(lookup)
+                    lookup.add_done_callback(lookups.discard)
+                if slots is not None:
+                    await slots.acquire()
+                await queue.put((index, url))
+        except Exception as e:
+            done.put_nowait(e)
+            return
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def call(url: str):
+        host = host_of(url)
+        if limiter is not None:
+            return await call_adaptive(url, host)
+        await hosts.acquire(host)
+        try:
+            return await fetch(url)
+        finally:
+            hosts.release(host)
+
+    async def call_adaptive(url: str, host: str):
+        await limiter.acquire(host)
+        start_time = time.perf_counter()
+        try:
+            result = await fetch(url)
+        except asyncio.CancelledError:
+            limiter.discard(host)
+            raise
+        except Exception:
+            limiter.release(host, time.perf_counter() - start_time, True)
+            raise
+        limiter.release(host, time.perf_counter() - start_time, is_failure(result))
+        return result
+
+    async def work():
+        while (item := await queue.get()) is not None:
+            index, url = item
+            try:
+                if flight is not None:
+                    result = await flight.do(url, lambda: call(url))
+                else:
+                    result = await call(url)
+            except Exception as e:
+                result = e
+            done.put_nowait((index, url, result))
+        done.put_nowait(None)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        finished = 0
+        pending: Dict[int, Tuple[int, str, Any]] = {}
+        next_index = 0
+        while finished < concurrency:
+            record = await done.get()
+            if record is None:
+                finished += 1
+            elif isinstance(record, Exception):
+                raise record
+            elif slots is None:
+                yield record
+            else:
+                pending[record[0]] = record
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+                    slots.release()
+    finally:
+        tasks += lookups
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def fetch_bounded(urls: Union[Iterable[str], AsyncIterable[str]],
+                        fetch: Callable[[str], Awaitable[Any]],
+                        concurrency: int = 100,
+                        per_host: int = 10,
+                        flight: Optional[SingleFlight] = None,
+                        limiter: Optional[AdaptiveLimiter] = None,
+                        grouped: Optional[bool] = False,
+                        dns: Optional[DnsCache] = None,
+                        group_window: int = 1000) -> List[Any]:
+    """Run fetch(url) for every URL on a fixed pool of workers and return the results in input order.
+
+    At most `concurrency` requests are in flight overall and at most `per_host`
+    to any one host. URLs are pulled lazily from `urls` through a bounded queue,
+    so only a fixed number of coroutines exist however long the list is.
+    Exceptions are returned in place of results, like gather(return_exceptions=True).
+    With grouped=True, URLs are read `group_window` at a time and each window
+    is dispatched in plan_by_origin order, so ingestion stays lazy and memory
+    bounded. Results still come back in input order. grouped=None groups
+    only inputs that are already in memory (anything with a len()), and
+    leaves iterators and async iterables in arrival order. A DnsCache
+    pre-resolves hosts as in stream_bounded.
+    """
+    origins: Optional[Dict[int, int]] = None
+    if grouped or (grouped is None and hasattr(urls, "__len__")):
+        origins = {}
+        urls = _grouped(urls, per_host, group_window, origins)
+    results: List[Any] = []
+    async for index, _, result in stream_bounded(urls, fetch, concurrency, per_host,
+                                                    flight=flight, limiter=limiter, dns=dns):
+        if origins is not None:
+            index = origins.pop(index)
+        if index >= len(results):
+            results.extend([None] * (index + 1 - len(results)))
+        results[index] = result
+    return results
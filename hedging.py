@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from adaptive_limit import percentile
+from fetch_engine import host_of
+
+
+class HedgePolicy:
+    """Decide when to send a backup copy of a slow request.
+
+    A request is hedged once it has run longer than the `quantile` latency of
+    the last `window` completed requests to the same host. Hosts with fewer
+    than min_samples completions are never hedged. Each request deposits
+    budget_ratio hedge tokens and each hedge spends one, so hedges stay below
+    that fraction of traffic.
+    """
+
+    def __init__(self, quantile: float = 0.95, window: int = 200, min_samples: int = 20,
+                 budget_ratio: float = 0.05, min_delay: float = 0.005):
+        self.quantile = quantile
+        self.window = window
+        self.min_samples = min_samples
+        self.budget_ratio = budget_ratio
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._balance = 0.0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._thresholds: Dict[str, float] = {}
+
+    def record(self, host: str, latency: float):
+        latencies = self._latencies.get(host)
+        if latencies is None:
+            latencies = self._latencies[host] = deque(maxlen=self.window)
+        latencies.append(latency)
+        # Recompute the threshold every 10 samples rather than sorting on every response.
+        if len(latencies) >= self.min_samples and (len(latencies) % 10 == 0 or host not in self._thresholds):
+            self._thresholds[host] = max(self.min_delay, percentile(latencies, self.quantile))
+
+    def delay(self, host: str) -> Optional[float]:
+        return self._thresholds.get(host)
+
+    def record_request(self):
+        self.requests += 1
+        self._balance = min(self._balance + self.budget_ratio, 10.0)
+
+    def try_hedge(self) -> bool:
+        if self._balance >= 1:
+            self._balance -= 1
+            self.hedges += 1
+            return True
+        return False
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins,
+                "thresholds": dict(self._thresholds)}
+
+
+async def hedged(fetch: Callable[[str], Awaitable[Any]], url: str, policy: HedgePolicy) -> Any:
+    """Call fetch(url), racing a second copy if the first is slower than the host's hedge threshold.
+
+    Whichever copy succeeds first wins and the other is cancelled. If the first
+    to finish failed, the other copy still gets to finish. Only use this for
+    idempotent requests.
+    """
+    host = host_of(url)
+    policy.record_request()
+    start_time = time.perf_counter()
+    primary = asyncio.ensure_future(fetch(url))
+    tasks = {primary}
+    try:
+        delay = policy.delay(host)
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and policy.try_hedge():
+                tasks.add(asyncio.ensure_future(fetch(url)))
+        while True:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if task.exception() is None), next(iter(done)))
+            if winner.exception() is None or not tasks:
+                break
+        if winner is not primary:
+            policy.hedge_wins += 1
+        result = winner.result()
+        policy.record(host, time.perf_counter() - start_time)
+        return result
+    finally:
+        for task in tasks:
+            task.cancel()
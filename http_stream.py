@@ -0,0 +1,109 @@
+import asyncio
+import httpx
+import backoff
+import time
+from typing import AsyncIterable, AsyncIterator, Iterable, NamedTuple, Optional, Tuple, Union
+from adaptive_limit import AdaptiveLimiter
+from client_pool import ClientPool, borrow_httpx
+from fetch_engine import stream_bounded
+from hedging import HedgePolicy, hedged
+from metrics import FetchMetrics
+from rate_limit import HostRateLimiter, RetryBudget, retrying_get
+from response_cache import ResponseCache, cached_get
+from single_flight import SingleFlight
+
+
+class StreamRecord(NamedTuple):
+    index: int
+    url: str
+    status: int
+    body: str
+    elapsed: float
+
+
+@backoff.on_exception(backoff.expo, (httpx.TimeoutException, httpx.HTTPStatusError), max_tries=5, max_time=60)
+async def http_get(client, url: str, timeout: int = 15,
+                   cache: Optional[ResponseCache] = None) -> Tuple[int, str, float]:
+    start_time = time.perf_counter()
+    if cache is not None:
+        status, text = await cached_get(client, url, cache, timeout)
+        return status, text, time.perf_counter() - start_time
+    response = await client.get(url, timeout=timeout)
+    return response.status_code, response.text, time.perf_counter() - start_time
+
+
+async def http_get_limited(client, url: str, timeout: int, rate_limiter: HostRateLimiter,
+                           retry_budget: Optional[RetryBudget] = None) -> Tuple[int, str, float]:
+    start_time = time.perf_counter()
+    response = await retrying_get(client, url, rate_limiter, retry_budget, timeout)
+    return response.status_code, response.text, time.perf_counter() - start_time
+
+
+async def http_get_stream(urls: Union[Iterable[str], AsyncIterable[str]], timeout: int = 10,
+                          concurrency: int = 100, per_host: int = 10,
+                          ordered: bool = False, window: Optional[int] = None,
+                          pool: Optional[ClientPool] = None,
+                          cache: Optional[ResponseCache] = None,
+                          flight: Optional[SingleFlight] = None,
+                          limiter: Optional[AdaptiveLimiter] = None,
+                          rate_limiter: Optional[HostRateLimiter] = None,
+                          retry_budget: Optional[RetryBudget] = None,
+                          hedge: Optional[HedgePolicy] = None,
+                          metrics: Optional[FetchMetrics] = None) -> AsyncIterator[StreamRecord]:
+    """Yield a StreamRecord for each URL as soon as its response lands.
+
+    Failed requests are yielded with status -1 and the error text as the body.
+    Pass ordered=True to get records in input order through a reorder buffer of
+    at most `window` records. Pass a ClientPool to reuse its connections across calls
+    (and pre-resolve hosts through its DnsCache, if it has one),
+    a ResponseCache to serve repeated URLs without refetching them, and a
+    SingleFlight to share one request among duplicate URLs in flight together.
+    An AdaptiveLimiter replaces the fixed per_host cap with one tuned per host
+    from observed latency and errors. A HostRateLimiter (with an optional
+    RetryBudget) swaps the backoff decorator for rate-limited, budgeted
+    retries; the cache is not consulted in that mode. A HedgePolicy races a
+    backup copy of requests that outlive their host's recent tail latency.
+    FetchMetrics counts in-flight, completed and timed-out requests, bytes and
+    latency for export through metrics.serve_metrics or write_snapshots.
+    """
+    limits = httpx.Limits(max_connections=concurrency)
+    async with borrow_httpx(pool, limits=limits) as client:
+        if rate_limiter is not None:
+            fetch = lambda url: http_get_limited(client, url, timeout, rate_limiter, retry_budget)
+        else:
+            fetch = lambda url: http_get(client, url, timeout, cache)
+        if hedge is not None:
+            fetch_once = fetch
+            fetch = lambda url: hedged(fetch_once, url, hedge)
+        if metrics is not None:
+            fetch = metrics.wrap(fetch)
+        async for index, url, result in stream_bounded(urls, fetch,
+                                                       concurrency=concurrency, per_host=per_host,
+                                                       ordered=ordered, window=window, flight=flight,
+                                                       limiter=limiter, dns=pool.dns if pool else None):
+            if isinstance(result, httpx.TimeoutException):
+                yield StreamRecord(index, url, -1, f"TimeoutError: Request to {url} timed out.", float(timeout))
+            elif isinstance(result, Exception):
+                yield StreamRecord(index, url, -1, f"Error: {str(result)}", 0.0)
+            else:
+                status, body, elapsed = result
+                yield StreamRecord(index, url, status, body, elapsed)
+
+
+async def test_async():
+    urls = [
+        'https://httpbin.org/delay/19',
+        'https://httpbin.org/delay/1',
+        'https://httpbin.org/delay/2',
+        'https://httpbin.org/delay/3',
+        'https://jsonplaceholder.typicode.com/posts/1',
+    ]
+
+    start_time = time.monotonic()
+    print('Trying httpGetStream...')
+    async for record in http_get_stream(urls, timeout=30):
+        print(f"{time.monotonic() - start_time:.2f}s #{record.index} {record.url}: {record.status}")
+
+
+if __name__ == '__main__':
+    asyncio.run(test_async())
@@ -0,0 +1,231 @@
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+PHASES = ("dns", "connect", "tls", "first_byte", "body", "total")
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations, recorded in microseconds.
+
+    Values below 2**sub_bits us get exact buckets. Above that, each
+    power-of-two range is split into 2**(sub_bits - 1) buckets, so any
+    recorded value is within 1 / 2**(sub_bits - 1) of its bucket (under 1.6%
+    for the default 7 bits). Memory is bounded by the dynamic range, not the
+    number of samples.
+    """
+
+    __slots__ = ("sub_bits", "counts", "count", "total", "min", "max")
+
+    def __init__(self, sub_bits: int = 7):
+        self.sub_bits = sub_bits
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        size = 1 << self.sub_bits
+        if value < size:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return size + (shift - 1) * (size >> 1) + (value >> shift) - (size >> 1)
+
+    def _bucket_value(self, index: int) -> int:
+        size = 1 << self.sub_bits
+        if index < size:
+            return index
+        shift, offset = divmod(index - size, size >> 1)
+        shift += 1
+        low = (offset + (size >> 1)) << shift
+        return low + (1 << shift) // 2
+
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "LatencyHistogram"):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        if other.count:
+            self.min = other.min if self.count == 0 else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, fraction: float) -> float:
+        """Return the duration in seconds at or below which `fraction` of samples fall."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._bucket_value(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def cumulative(self, bounds: List[float]) -> List[int]:
+        """Return how many samples fall at or below each bound (seconds, ascending), Prometheus-bucket style."""
+        limits = [bound * 1_000_000 for bound in bounds]
+        result = [0] * len(limits)
+        position = 0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            value = self._bucket_value(index)
+            while position < len(limits) and value > limits[position]:
+                result[position] = seen
+                position += 1
+            seen += count
+        for position in range(position, len(limits)):
+            result[position] = seen
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self.count,
+                "min": self.min / 1_000_000,
+                "mean": self.total / self.count / 1_000_000 if self.count else 0.0,
+                "p50": self.percentile(0.50),
+                "p90": self.percentile(0.90),
+                "p99": self.percentile(0.99),
+                "p999": self.percentile(0.999),
+                "max": self.max / 1_000_000}
+
+
+class Instrumentation:
+    """Per-host phase histograms and per-status total-latency histograms.
+
+    Phases are dns, connect, tls, first_byte (request sent to response
+    headers), body (headers to body complete) and total. httpx_trace() plugs
+    into an httpx request's "trace" extension; ClientPool installs it for
+    every request when given an Instrumentation. aiohttp_trace_config() does
+    the same for aiohttp and measures the same phases the same way, except
+    that aiohttp reports TLS as part of connect. On both backends connect
+    includes the DNS lookup. httpcore does not report lookups, so for httpx
+    dns is only recorded when the ClientPool also has a DnsCache, whose
+    HttpcoreBackend times them.
+    """
+
+    def __init__(self, sub_bits: int = 7):
+        self.sub_bits = sub_bits
+        self.by_host: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.by_status: Dict[int, LatencyHistogram] = {}
+
+    def record(self, phase: str, host: str, seconds: float):
+        histogram = self.by_host.get((phase, host))
+        if histogram is None:
+            histogram = self.by_host[(phase, host)] = LatencyHistogram(self.sub_bits)
+        histogram.record(seconds)
+
+    def record_status(self, status: int, seconds: float):
+        histogram = self.by_status.get(status)
+        if histogram is None:
+            histogram = self.by_status[status] = LatencyHistogram(self.sub_bits)
+        histogram.record(seconds)
+
+    def httpx_trace(self, host: str):
+        """Return an httpcore trace callback that times one request's phases against host."""
+        started: Dict[str, float] = {"request": time.perf_counter()}
+        status: List[Optional[int]] = [None]
+
+        async def trace(event_name: str, info: dict):
+            now = time.perf_counter()
+            step, _, stage = event_name.rpartition(".")
+            if stage == "started":
+                started[step] = now
+            elif stage != "complete":
+                return
+            elif step == "connection.connect_tcp":
+                self.record("connect", host, now - started.get(step, now))
+            elif step == "connection.start_tls":
+                self.record("tls", host, now - started.get(step, now))
+            elif step.endswith("send_request_headers"):
+                started["sent"] = now
+            elif step.endswith("receive_response_headers"):
+                started["headers"] = now
+                self.record("first_byte", host, now - started.get("sent", started["request"]))
+                value = info.get("return_value")
+                if isinstance(value, tuple) and len(value) > 1 and isinstance(value[1], int):
+                    status[0] = value[1]
+            elif step.endswith("receive_response_body"):
+                self.record("body", host, now - started.get("headers", now))
+                total = now - started["request"]
+                self.record("total", host, total)
+                if status[0] is not None:
+                    self.record_status(status[0], total)
+
+        return trace
+
+    def aiohttp_trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            context.started = {"request": time.perf_counter()}
+            context.host = params.url.host
+
+        def starter(step):
+            async def on_start(session, context, params):
+                context.started[step] = time.perf_counter()
+            return on_start
+
+        def finisher(step):
+            async def on_end(session, context, params):
+                self.record(step, context.host, time.perf_counter() - context.started.get(step, time.perf_counter()))
+            return on_end
+
+        async def on_request_headers_sent(session, context, params):
+            context.started["sent"] = time.perf_counter()
+
+        async def on_request_end(session, context, params):
+            headers_at = time.perf_counter()
+            self.record("first_byte", context.host, headers_at - context.started.get("sent", context.started["request"]))
+            status = params.response.status
+
+            def on_body_complete():
+                now = time.perf_counter()
+                self.record("body", context.host, now - headers_at)
+                total = now - context.started["request"]
+                self.record("total", context.host, total)
+                self.record_status(status, total)
+
+            # Fires once the whole body has been received, like httpx's receive_response_body.
+            params.response.content.on_eof(on_body_complete)
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_dns_resolvehost_start.append(starter("dns"))
+        trace.on_dns_resolvehost_end.append(finisher("dns"))
+        trace.on_connection_create_start.append(starter("connect"))
+        trace.on_connection_create_end.append(finisher("connect"))
+        trace.on_request_headers_sent.append(on_request_headers_sent)
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"hosts": {f"{phase} {host}": histogram.snapshot()
+                          for (phase, host), histogram in sorted(self.by_host.items())},
+                "statuses": {str(status): histogram.snapshot()
+                             for status, histogram in sorted(self.by_status.items())}}
+
+    def write_snapshot(self, path: Path):
+        Path(path).write_text(json.dumps(self.snapshot(), indent=2))
+
+    def reset(self):
+        self.by_host.clear()
+        self.by_status.clear()
@@ -0,0 +1,84 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+class JobJournal:
+    """Durable record of which URL indexes a run has finished and where each result was written.
+
+    Finished jobs are buffered and committed to SQLite in batches, every
+    `batch_size` records or `flush_interval` seconds, whichever comes first.
+    The database is in WAL mode with synchronous=NORMAL, so a commit is an
+    append to the write-ahead log rather than an fsync per request. Before
+    each commit, `before_commit` runs, e.g. the result writer's flush. That
+    way a committed index always points at data already handed to the OS. A
+    crash loses at most the last uncommitted batch, and those URLs are simply
+    fetched again on resume.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 500, flush_interval: float = 1.0,
+                 before_commit: Optional[Callable[[], None]] = None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.before_commit = before_commit
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS jobs (idx INTEGER PRIMARY KEY, url TEXT, status INTEGER,"
+                         " location TEXT, offset INTEGER, finished_at REAL)")
+        self._pending: List[Tuple[int, str, int, Optional[str], Optional[int], float]] = []
+        self._last_commit = time.monotonic()
+        self._done = bytearray()
+        for (index,) in self._db.execute("SELECT idx FROM jobs"):
+            self._mark(index)
+
+    def _mark(self, index: int):
+        byte = index >> 3
+        if byte >= len(self._done):
+            self._done.extend(bytes(byte + 1 - len(self._done)))
+        self._done[byte] |= 1 << (index & 7)
+
+    def is_done(self, index: int) -> bool:
+        byte = index >> 3
+        return byte < len(self._done) and bool(self._done[byte] & (1 << (index & 7)))
+
+    def remaining(self, urls: Iterable[str]) -> Iterator[Tuple[int, str]]:
+        """Yield (index, url) for every URL not yet recorded as finished."""
+        for index, url in enumerate(urls):
+            if not self.is_done(index):
+                yield index, url
+
+    def record(self, index: int, url: str, status: int, location: Optional[Path] = None,
+               offset: Optional[int] = None):
+        self._mark(index)
+        self._pending.append((index, url, status, str(location) if location is not None else None,
+                              offset, time.time()))
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_commit >= self.flush_interval:
+            self.commit()
+
+    def commit(self):
+        if self._pending:
+            if self.before_commit is not None:
+                self.before_commit()
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+            self._pending.clear()
+        self._last_commit = time.monotonic()
+
+    def completed(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] + len(self._pending)
+
+    def results(self) -> Iterator[Tuple[int, str, int, Optional[str], Optional[int]]]:
+        """Yield (index, url, status, location, offset) for committed jobs in index order."""
+        yield from self._db.execute("SELECT idx, url, status, location, offset FROM jobs ORDER BY idx")
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
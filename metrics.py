@@ -0,0 +1,302 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from instrumentation import LatencyHistogram
+
+DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    """Base for metrics with optional labels; each label combination gets its own child value.
+
+    Updates are plain attribute arithmetic with no locks. That is safe because
+    the fetchers update metrics from a single event-loop thread.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self.labels()
+
+    def labels(self, *values: Any):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """Create the value object held for one label combination."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {child.value}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _ReadValue:
+    __slots__ = ("read",)
+
+    def __init__(self, read: Callable[[], float]):
+        self.read = read
+
+    @property
+    def value(self) -> float:
+        return self.read()
+
+
+class CallbackMetric(Metric):
+    """Metric whose value is read from a function at scrape time, e.g. counters kept by ClientPool."""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float], kind: str = "gauge"):
+        self.kind = kind
+        self.read = read
+        super().__init__(name, help_text)
+
+    def _new_child(self):
+        return _ReadValue(self.read)
+
+
+class Histogram(Metric):
+    """Latency histogram backed by LatencyHistogram and exported as cumulative Prometheus buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Optional[List[float]] = None):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = buckets or DEFAULT_BUCKETS
+
+    def _new_child(self):
+        return LatencyHistogram()
+
+    def observe(self, seconds: float):
+        self.labels().record(seconds)
+
+    def _render_child(self, key, child: LatencyHistogram) -> List[str]:
+        lines = []
+        for bound, count in zip(self.buckets, child.cumulative(self.buckets)):
+            bucket = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+            lines.append(f"{self.name}_bucket{bucket} {count}")
+        bucket = _format_labels(self.labelnames, key, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{bucket} {child.count}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {child.total / 1_000_000}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Optional[List[float]] = None) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name: str, help_text: str, read: Callable[[], float], kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help_text, read, kind))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _is_timeout(error: BaseException) -> bool:
+    return isinstance(error, asyncio.TimeoutError) or "Timeout" in type(error).__name__
+
+
+class FetchMetrics:
+    """Standard metrics for a fetch worker, plus a wrapper that records them around any fetch(url) coroutine.
+
+    Results may be an int status, a tuple starting with the status, or a
+    transports.FetchResult. The body (FetchResult.body, else the first
+    str/bytes field) is counted as bytes in, with text counted as its UTF-8
+    encoded length. Bytes out is an estimate from the GET request line and Host
+    header. Attach a ClientPool or RetryBudget to export their counters too.
+    """
+
+    def __init__(self, registry: Optional[Registry] = None):
+        self.registry = registry or Registry()
+        r = self.registry
+        self.in_flight = r.gauge("fetch_requests_in_flight", "Requests currently in flight")
+        self.completed = r.counter("fetch_requests_total", "Completed requests by status", ("status",))
+        self.timeouts = r.counter("fetch_timeouts_total", "Requests that timed out")
+        self.errors = r.counter("fetch_errors_total", "Requests that failed with an error other than a timeout")
+        self.bytes_in = r.counter("fetch_bytes_in_total", "Response body bytes received")
+        self.bytes_out = r.counter("fetch_bytes_out_total", "Request head bytes sent (estimated)")
+        self.latency = r.histogram("fetch_request_duration_seconds", "Request latency", ("host",))
+
+    def attach_pool(self, pool):
+        self.registry.callback("fetch_pool_connections_open", "Connections the client pool holds open",
+                               lambda: pool.occupancy()["open"])
+        self.registry.callback("fetch_pool_connections_busy", "Pool connections currently serving a request",
+                               lambda: pool.occupancy()["busy"])
+        self.registry.callback("fetch_pool_connections_limit", "Connection limit of each client in the pool",
+                               lambda: pool.max_connections)
+        self.registry.callback("fetch_pool_requests_total", "Requests made through the client pool",
+                               lambda: pool.requests, "counter")
+        self.registry.callback("fetch_pool_new_connections_total", "Connections opened by the client pool",
+                               lambda: pool.new_connections, "counter")
+        self.registry.callback("fetch_pool_reused_connections_total", "Requests served on a reused connection",
+                               lambda: pool.reused_connections, "counter")
+
+    def attach_retry_budget(self, budget):
+        self.registry.callback("fetch_retries_total", "Retries allowed by the retry budget",
+                               lambda: budget.retries, "counter")
+        self.registry.callback("fetch_retries_denied_total", "Retries refused by the retry budget",
+                               lambda: budget.denied, "counter")
+
+    def wrap(self, fetch: Callable[[str], Awaitable[Any]]) -> Callable[[str], Awaitable[Any]]:
+        async def measured(url: str):
+            parts = urlsplit(url)
+            self.in_flight.inc()
+            self.bytes_out.inc(len(parts.path) + len(parts.query) + len(parts.netloc) + 24)
+            start_time = time.perf_counter()
+            try:
+                result = await fetch(url)
+            except Exception as e:
+                if _is_timeout(e):
+                    self.timeouts.inc()
+                else:
+                    self.errors.inc()
+                raise
+            finally:
+                self.in_flight.dec()
+                self.latency.labels(parts.netloc).record(time.perf_counter() - start_time)
+            self._observe(result)
+            return result
+        return measured
+
+    def _observe(self, result: Any):
+        status = getattr(result, "status", None)
+        fields = result if isinstance(result, tuple) else (result,)
+        if status is None and fields and isinstance(fields[0], int):
+            status = fields[0]
+        self.completed.labels(status if status is not None else "unknown").inc()
+        if status == -1:
+            self.timeouts.inc()
+        body = getattr(result, "body", None)
+        if body is None:
+            body = next((field for field in fields if isinstance(field, (str, bytes, bytearray, memoryview))), None)
+        if isinstance(body, str):
+            self.bytes_in.inc(len(body.encode()))
+        elif isinstance(body, memoryview):
+            self.bytes_in.inc(body.nbytes)
+        elif isinstance(body, (bytes, bytearray)):
+            self.bytes_in.inc(len(body))
+
+
+async def serve_metrics(registry: Registry, host: str = "127.0.0.1", port: int = 9100) -> asyncio.base_events.Server:
+    """Serve registry.render() at http://host:port/metrics until the returned server is closed."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            if request_line.split(b" ")[1:2] == [b"/metrics"]:
+                body = registry.render().encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                             b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body))
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+        except (ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def write_snapshots(registry: Registry, path: Path, interval: float = 15.0):
+    """Rewrite path with registry.render() every `interval` seconds until cancelled.
+
+    Each snapshot is written to a temp file and renamed into place, so readers
+    never see a partial file.
+    """
+    path = Path(path)
+    partial = path.with_name(path.name + ".tmp")
+    while True:
+        partial.write_text(registry.render())
+        os.replace(partial, path)
+        await asyncio.sleep(interval)
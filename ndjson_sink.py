@@ -0,0 +1,97 @@
+import json
+from pathlib import Path
+from typing import Any, AsyncIterable, Dict, Optional, Tuple
+
+
+def _trim_partial_line(path: Path, chunk_size: int = 1 << 16) -> int:
+    """Truncate path just after its last newline and return the new size."""
+    with path.open("r+b") as f:
+        end = f.seek(0, 2)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            f.truncate(position)
+        return position
+
+
+class NdjsonWriter:
+    """Append one compact JSON object per line to a file, optionally rotating by size.
+
+    Lines go through a buffered binary file handle, so nothing is held beyond
+    the write buffer. When max_bytes is set and the next line would push the
+    current file past it, the file is closed and writing continues in
+    <stem>.1<suffix>, <stem>.2<suffix>, and so on. Use it as a context manager
+    so the buffer is flushed and closed on errors and task cancellation too.
+    With append=True, writing continues at the end of the last existing part
+    instead of truncating, as a resumed run needs. A torn last line left by a
+    crash mid-flush is cut off first, so new records start on a fresh line.
+    """
+
+    def __init__(self, output_path: Path, max_bytes: Optional[int] = None, buffer_size: int = 1 << 16,
+                 append: bool = False):
+        self.output_path = Path(output_path)
+        self.max_bytes = max_bytes
+        self.buffer_size = buffer_size
+        self.records_written = 0
+        self.part = 0
+        self._bytes_in_part = 0
+        self._file = None
+        self._mode = "ab" if append else "wb"
+        if append:
+            while self._part_path(self.part + 1).exists():
+                self.part += 1
+            if self.current_path().exists():
+                self._bytes_in_part = _trim_partial_line(self.current_path())
+
+    def _part_path(self, part: int) -> Path:
+        if part == 0:
+            return self.output_path
+        return self.output_path.with_name(f"{self.output_path.stem}.{part}{self.output_path.suffix}")
+
+    def current_path(self) -> Path:
+        return self._part_path(self.part)
+
+    def write(self, record: Dict[str, Any]) -> Tuple[Path, int]:
+        """Write one record and return the file and byte offset its line starts at."""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        if self._file is None:
+            self._file = self.current_path().open(self._mode, buffering=self.buffer_size)
+        elif self.max_bytes is not None and self._bytes_in_part and self._bytes_in_part + len(line) > self.max_bytes:
+            self._file.close()
+            self.part += 1
+            self._bytes_in_part = 0
+            self._file = self.current_path().open("wb", buffering=self.buffer_size)
+        offset = self._bytes_in_part
+        self._file.write(line)
+        self._bytes_in_part += len(line)
+        self.records_written += 1
+        return self.current_path(), offset
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def write_stream(records: AsyncIterable[Dict[str, Any]], writer: NdjsonWriter) -> int:
+    """Write records to writer as they arrive and return how many were written."""
+    async for record in records:
+        writer.write(record)
+    return writer.records_written
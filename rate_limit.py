@@ -0,0 +1,207 @@
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+from fetch_engine import host_of
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+RETRY_LANE = 0
+FRESH_LANE = 1
+
+
+class TokenBucket:
+    """Token bucket admitting `rate` requests per second with bursts of up to `burst`.
+
+    Waiters queue in two lanes and retries are always served before fresh
+    requests. pause() stops admission until a given time, which is how
+    Retry-After is honored for a whole host.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lanes: tuple = (deque(), deque())
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self, now: float):
+        self.tokens = min(float(self.burst), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def take(self, lane: int = FRESH_LANE):
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1 and now >= self.paused_until and not any(self._lanes):
+            self.tokens -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._lanes[lane].append(waiter)
+        self._schedule()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.tokens += 1
+            elif waiter in self._lanes[lane]:
+                self._lanes[lane].remove(waiter)
+            raise
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if any(self._lanes):
+            self._schedule()
+
+    def _schedule(self):
+        if self._timer is not None:
+            return
+        now = time.monotonic()
+        delay = max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.0)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self):
+        self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        if now >= self.paused_until:
+            for lane in self._lanes:
+                while lane and self.tokens >= 1:
+                    waiter = lane.popleft()
+                    if not waiter.done():
+                        self.tokens -= 1
+                        waiter.set_result(None)
+        if any(self._lanes):
+            self._schedule()
+
+
+class HostRateLimiter:
+    """One TokenBucket per host, plus the per-host backoff shared by every request to that host."""
+
+    def __init__(self, rate: float = 10.0, burst: int = 10, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._failures: Dict[str, int] = {}
+
+    def bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def record(self, host: str, failed: bool):
+        if failed:
+            self._failures[host] = self._failures.get(host, 0) + 1
+        else:
+            self._failures.pop(host, None)
+
+    def retry_delay(self, host: str) -> float:
+        """Backoff for the next retry to host.
+
+        The exponent comes from the host's consecutive failures, not the
+        request's own attempt count, so every request retrying against a
+        struggling host backs off together. Full jitter then spreads them
+        across the window, and the host's retry lane meters them out at the
+        bucket rate, so they never come back as one burst.
+        """
+        failures = self._failures.get(host, 1)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** min(failures, 16)))
+
+
+class RetryBudget:
+    """Cap retries to a fraction of fresh traffic.
+
+    Every fresh request deposits `ratio` tokens and every retry spends one, so
+    at most about ratio * requests retries happen. `reserve` tokens are there
+    from the start so a quiet client can still retry a little. The balance
+    never exceeds `max_balance`, so a long healthy run cannot bank retries
+    for a later failure storm to spend all at once.
+    """
+
+    def __init__(self, ratio: float = 0.1, reserve: int = 10, max_balance: float = 20.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.max_balance = max(max_balance, reserve)
+        self.balance = float(reserve)
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    def record_request(self):
+        self.requests += 1
+        self.balance = min(self.balance + self.ratio, self.max_balance)
+
+    def try_spend(self) -> bool:
+        if self.balance >= 1:
+            self.balance -= 1
+            self.retries += 1
+            return True
+        self.denied += 1
+        return False
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header, given as seconds or an HTTP date."""
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def retrying_get(client: httpx.AsyncClient, url: str, limiter: HostRateLimiter,
+                       budget: Optional[RetryBudget] = None, timeout: int = 15,
+                       max_tries: int = 5, max_time: float = 60) -> httpx.Response:
+    """GET url through the host's token bucket, retrying timeouts, transport errors and 429/5xx responses.
+
+    Replaces the per-call backoff decorator. Retries need a token from the
+    shared RetryBudget, wait out the host-wide backoff or Retry-After, and
+    queue in the bucket's retry lane ahead of fresh requests. Once tries,
+    time or budget run out, the last response is returned or the last error
+    is raised.
+    """
+    host = host_of(url)
+    bucket = limiter.bucket(host)
+    deadline = time.monotonic() + max_time
+    if budget is not None:
+        budget.record_request()
+    lane = FRESH_LANE
+    for attempt in range(1, max_tries + 1):
+        await bucket.take(lane)
+        try:
+            response = await client.get(url, timeout=timeout)
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            limiter.record(host, failed=True)
+            response, error = None, e
+            if attempt == max_tries:
+                raise
+        else:
+            failed = response.status_code in RETRY_STATUSES
+            limiter.record(host, failed)
+            if not failed or attempt == max_tries:
+                return response
+            if (wait := retry_after(response)) is not None:
+                bucket.pause(wait)
+
+        delay = limiter.retry_delay(host)
+        if time.monotonic() + delay > deadline or (budget is not None and not budget.try_spend()):
+            if response is None:
+                raise error
+            return response
+        await asyncio.sleep(delay)
+        lane = RETRY_LANE
@@ -0,0 +1,277 @@
+import asyncio
+import ssl
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+from dns_cache import DnsCache, open_connection
+from fetch_engine import fetch_bounded
+
+Origin = Tuple[str, str, int]
+
+
+async def _open(host: str, port: int, ssl_context: Optional[ssl.SSLContext], dns: Optional[DnsCache]):
+    if dns is None:
+        return await asyncio.open_connection(host, port, ssl=ssl_context)
+    return await open_connection(host, port, dns, ssl=ssl_context)
+
+
+class RawResponse:
+    __slots__ = ("status", "headers", "body", "keep_alive")
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, keep_alive: bool):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+
+
+def split_url(url: str) -> Tuple[Origin, str, str]:
+    """Return ((scheme, host, port), Host header value, request target) for url."""
+    parts = urlsplit(url)
+    https = parts.scheme == "https"
+    port = parts.port or (443 if https else 80)
+    target = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+    return (parts.scheme, parts.hostname, port), parts.netloc, target
+
+
+async def read_response(reader: asyncio.StreamReader, head_only: bool = False) -> RawResponse:
+    """Read one HTTP/1.1 response: status line, headers, then a Content-Length, chunked or read-to-close body."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Connection closed before a response arrived")
+    version, status = status_line[:8], int(status_line[9:12])
+    headers: Dict[str, str] = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    keep_alive = headers.get("connection", "").lower() != "close" and version == b"HTTP/1.1"
+    if head_only or status in (204, 304) or 100 <= status < 200:
+        return RawResponse(status, headers, b"", keep_alive)
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = bytearray()
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        return RawResponse(status, headers, bytes(body), keep_alive)
+    if "content-length" in headers:
+        return RawResponse(status, headers, await reader.readexactly(int(headers["content-length"])), keep_alive)
+    return RawResponse(status, headers, await reader.read(), False)
+
+
+class RawClient:
+    """Bare-bones HTTP/1.1 GET client on asyncio streams with per-origin keep-alive connections.
+
+    No redirects, cookies, proxies or content decoding: requests ask for
+    identity encoding, and bodies come back as raw bytes. With a DnsCache,
+    new connections use its cached addresses and happy-eyeballs connect.
+    """
+
+    def __init__(self, max_idle_per_host: int = 10, ssl_context: Optional[ssl.SSLContext] = None,
+                 dns: Optional[DnsCache] = None):
+        self.max_idle_per_host = max_idle_per_host
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.dns = dns
+        self._idle: Dict[Origin, List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+
+    async def _connect(self, origin: Origin):
+        scheme, host, port = origin
+        return await _open(host, port, self.ssl_context if scheme == "https" else None, self.dns)
+
+    def _checkin(self, origin: Origin, connection, keep_alive: bool):
+        idle = self._idle.setdefault(origin, [])
+        if keep_alive and len(idle) < self.max_idle_per_host:
+            idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def request(self, method: str, url: str) -> RawResponse:
+        origin, host, target = split_url(url)
+        request = f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: identity\r\n\r\n".encode("latin-1")
+        idle = self._idle.get(origin)
+        while idle:
+            # A pooled connection may have been closed by the server while idle; fall through to a fresh one.
+            reader, writer = idle.pop()
+            try:
+                writer.write(request)
+                response = await read_response(reader, head_only=method == "HEAD")
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                writer.close()
+                continue
+            except BaseException:
+                writer.close()
+                raise
+            self._checkin(origin, (reader, writer), response.keep_alive)
+            return response
+        reader, writer = await self._connect(origin)
+        try:
+            writer.write(request)
+            response = await read_response(reader, head_only=method == "HEAD")
+        except BaseException:
+            writer.close()
+            raise
+        self._checkin(origin, (reader, writer), response.keep_alive)
+        return response
+
+    async def get(self, url: str) -> RawResponse:
+        return await self.request("GET", url)
+
+    async def aclose(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+
+class PipelinedConnection:
+    """One keep-alive connection with requests pipelined on it; responses are matched to callers in FIFO order.
+
+    Only the status line and the Content-Length, Transfer-Encoding and
+    Connection headers are looked at, and bodies are skipped without
+    building a headers dict or a response object.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, head_only: bool):
+        self.reader = reader
+        self.writer = writer
+        self.head_only = head_only
+        self.pending: deque = deque()
+        self.closed = False
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+
+    def send(self, request: bytes) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(future)
+        self.writer.write(request)
+        return future
+
+    async def _read_loop(self):
+        reader = self.reader
+        try:
+            while True:
+                status_line = await reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("Connection closed with requests in flight")
+                status = int(status_line[9:12])
+                length = -1
+                chunked = False
+                keep_alive = status_line.startswith(b"HTTP/1.1")
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    first = line[:1].lower()
+                    if first == b"c":
+                        lowered = line.lower()
+                        if lowered.startswith(b"content-length:"):
+                            length = int(line[15:])
+                        elif lowered.startswith(b"connection:") and b"close" in lowered:
+                            keep_alive = False
+                    elif first == b"t" and line.lower().startswith(b"transfer-encoding:") and b"chunked" in line.lower():
+                        chunked = True
+                if not self.head_only and status not in (204, 304):
+                    if chunked:
+                        while size := int((await reader.readline()).split(b";")[0], 16):
+                            await reader.readexactly(size + 2)
+                        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                            pass
+                    elif length > 0:
+                        await reader.readexactly(length)
+                    elif length < 0:
+                        await reader.read()
+                        keep_alive = False
+                future = self.pending.popleft()
+                if not future.done():
+                    future.set_result(status)
+                if not keep_alive:
+                    raise ConnectionResetError("Server closed the connection")
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            self._fail(e if isinstance(e, ConnectionError) else ConnectionResetError(str(e)))
+        except asyncio.CancelledError:
+            self._fail(ConnectionResetError("Connection closed"))
+            raise
+
+    def _fail(self, error: BaseException):
+        self.closed = True
+        self.writer.close()
+        while self.pending:
+            future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self):
+        self._reader_task.cancel()
+
+
+class StatusProber:
+    """High-rate status-code prober: pipelined requests over a small pool of keep-alive connections per origin.
+
+    Each origin gets up to `connections_per_host` connections and each
+    connection carries up to `pipeline_depth` outstanding requests; past that,
+    requests go to the least-loaded connection. Use method="HEAD" when the
+    target answers HEAD correctly, to skip bodies altogether. Requests that
+    fail because a pipelined connection closed under them are retried once
+    on a fresh connection. A DnsCache is used as in RawClient.
+    """
+
+    def __init__(self, connections_per_host: int = 4, pipeline_depth: int = 16, method: str = "GET",
+                 ssl_context: Optional[ssl.SSLContext] = None, dns: Optional[DnsCache] = None):
+        self.connections_per_host = connections_per_host
+        self.pipeline_depth = pipeline_depth
+        self.method = method
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.dns = dns
+        self._pools: Dict[Origin, List[PipelinedConnection]] = {}
+        self._connecting: Dict[Origin, int] = {}
+
+    async def _connection(self, origin: Origin) -> PipelinedConnection:
+        pool = self._pools.setdefault(origin, [])
+        pool[:] = [connection for connection in pool if not connection.closed]
+        best = min(pool, key=lambda connection: len(connection.pending), default=None)
+        opening = self._connecting.get(origin, 0)
+        if best is not None and (len(best.pending) < self.pipeline_depth or len(pool) + opening >= self.connections_per_host):
+            return best
+        self._connecting[origin] = opening + 1
+        try:
+            scheme, host, port = origin
+            reader, writer = await _open(host, port, self.ssl_context if scheme == "https" else None, self.dns)
+        finally:
+            self._connecting[origin] -= 1
+        connection = PipelinedConnection(reader, writer, head_only=self.method == "HEAD")
+        pool.append(connection)
+        return connection
+
+    async def probe(self, url: str) -> int:
+        origin, host, target = split_url(url)
+        request = b"%s %s HTTP/1.1\r\nHost: %s\r\n\r\n" % (self.method.encode(), target.encode("latin-1"),
+                                                         host.encode("latin-1"))
+        for attempt in range(2):
+            connection = await self._connection(origin)
+            try:
+                return await connection.send(request)
+            except ConnectionResetError:
+                if attempt:
+                    raise
+
+    async def aclose(self):
+        for pool in self._pools.values():
+            for connection in pool:
+                connection.close()
+        self._pools.clear()
+
+
+async def probe_status(urls, timeout: float = 10, concurrency: int = 1000, connections_per_host: int = 4,
+                       pipeline_depth: int = 16, method: str = "GET",
+                       dns: Optional[DnsCache] = None) -> List[Union[int, str]]:
+    """Return the status code for each URL in input order, or an error string like http_get_parallel.
+
+    With a DnsCache, every distinct host is resolved before the first request goes out.
+    """
+    prober = StatusProber(connections_per_host, pipeline_depth, method, dns=dns)
+    if dns is not None and not hasattr(urls, "__aiter__"):
+        urls = list(urls)
+        await dns.prefetch(urls)
+    try:
+        results = await fetch_bounded(urls, lambda url: asyncio.wait_for(prober.probe(url), timeout),
+                                      concurrency=concurrency, per_host=connections_per_host * pipeline_depth)
+    finally:
+        await prober.aclose()
+    return [str(result) if isinstance(result, Exception) else result for result in results]
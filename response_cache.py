@@ -0,0 +1,217 @@
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import httpx
+
+
+class CacheEntry(NamedTuple):
+    status: int
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    max_age: float  # seconds the entry is fresh for; 0 means revalidate on every use
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.stored_at < self.max_age
+
+
+class MemoryBackend:
+    """In-memory LRU store bounded by the total size of cached bodies."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def set(self, url: str, entry: CacheEntry):
+        if len(entry.body) > self.max_bytes:
+            return
+        self.delete(url)
+        self._entries[url] = entry
+        self.size += len(entry.body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.body)
+
+    def delete(self, url: str):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+
+
+class SqliteBackend:
+    """On-disk store keeping one row per URL in a SQLite database."""
+
+    def __init__(self, path: Path):
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, status INTEGER, body BLOB,"
+                         " etag TEXT, last_modified TEXT, stored_at REAL, max_age REAL)")
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        row = self._db.execute("SELECT status, body, etag, last_modified, stored_at, max_age FROM responses"
+                               " WHERE url = ?", (url,)).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def set(self, url: str, entry: CacheEntry):
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)", (url, *entry))
+
+    def delete(self, url: str):
+        with self._db:
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+
+    def close(self):
+        self._db.close()
+
+
+class DirectoryBackend:
+    """On-disk store keeping one file per URL: a JSON metadata line followed by the raw body."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, url: str) -> Path:
+        return self.path / hashlib.sha256(url.encode()).hexdigest()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        try:
+            with self._file(url).open("rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.pop("url") != url:
+            return None
+        return CacheEntry(body=body, **meta)
+
+    def set(self, url: str, entry: CacheEntry):
+        meta = entry._asdict()
+        del meta["body"]
+        meta["url"] = url
+        target = self._file(url)
+        partial = target.with_suffix(".tmp")
+        with partial.open("wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n")
+            f.write(entry.body)
+        partial.replace(target)
+
+    def delete(self, url: str):
+        self._file(url).unlink(missing_ok=True)
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in value.split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness(headers, now: float, default_ttl: Optional[float]) -> Optional[float]:
+    """Return how long a response may be served without revalidation, or None if it must not be stored."""
+    directives = parse_cache_control(headers.get("cache-control", ""))
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if (directives.get(name) or "").isdigit():
+            return float(directives[name])
+    if "expires" in headers:
+        try:
+            return max(0.0, parsedate_to_datetime(headers["expires"]).timestamp() - now)
+        except (TypeError, ValueError):
+            return 0.0
+    if default_ttl is not None:
+        return default_ttl
+    if "etag" in headers or "last-modified" in headers:
+        return 0.0
+    return None
+
+
+class ResponseCache:
+    """Two-tier HTTP response cache: a memory LRU in front of an optional disk backend.
+
+    Freshness comes from Cache-Control (max-age, s-maxage, no-cache, no-store)
+    or Expires. default_ttl applies to responses that carry no caching headers
+    at all, which covers endpoints like httpbin.org that never send them.
+    Stale entries holding an ETag or Last-Modified are revalidated with
+    If-None-Match / If-Modified-Since, and a 304 refreshes them without
+    downloading the body again.
+    """
+
+    def __init__(self, memory: Optional[MemoryBackend] = None, disk=None, default_ttl: Optional[float] = None):
+        self.memory = memory or MemoryBackend()
+        self.disk = disk
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(url)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(url)
+            if entry is not None:
+                self.memory.set(url, entry)
+        return entry
+
+    def set(self, url: str, entry: CacheEntry):
+        self.memory.set(url, entry)
+        if self.disk is not None:
+            self.disk.set(url, entry)
+
+    def store(self, url: str, response: httpx.Response) -> Optional[CacheEntry]:
+        now = time.time()
+        max_age = freshness(response.headers, now, self.default_ttl)
+        if response.status_code != 200 or max_age is None:
+            return None
+        entry = CacheEntry(response.status_code, response.content, response.headers.get("etag"),
+                           response.headers.get("last-modified"), now, max_age)
+        self.set(url, entry)
+        return entry
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated}
+
+
+async def cached_get(client: httpx.AsyncClient, url: str, cache: ResponseCache, timeout: int = 15) -> Tuple[int, str]:
+    """GET url through cache and return (status_code, text) like http_get."""
+    entry = cache.get(url)
+    now = time.time()
+    if entry is not None and entry.is_fresh(now):
+        cache.hits += 1
+        return entry.status, entry.body.decode("utf-8", errors="replace")
+
+    headers = {}
+    if entry is not None and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry is not None and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    response = await client.get(url, timeout=timeout, headers=headers)
+
+    if entry is not None and response.status_code == 304:
+        cache.revalidated += 1
+        max_age = freshness(response.headers, now, cache.default_ttl)
+        entry = entry._replace(stored_at=now, max_age=entry.max_age if max_age is None else max_age)
+        cache.set(url, entry)
+        return entry.status, entry.body.decode("utf-8", errors="replace")
+
+    cache.misses += 1
+    cache.store(url, response)
+    return response.status_code, response.text
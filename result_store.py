@@ -0,0 +1,126 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Tuple, Union
+
+
+class ResultView:
+    """Lazy view of one row in a ResultStore; fields are read from the columns on access."""
+
+    __slots__ = ("_store", "index")
+
+    def __init__(self, store: "ResultStore", index: int):
+        self._store = store
+        self.index = index
+
+    @property
+    def status(self) -> int:
+        return self._store.status_codes[self.index]
+
+    @property
+    def response_time(self) -> float:
+        return self._store.response_times[self.index]
+
+    @property
+    def url(self) -> str:
+        return self._store.urls[self._store.url_ids[self.index]]
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self._store.timestamps[self.index], timezone.utc)
+
+    @property
+    def body(self) -> bytes:
+        return self._store.body(self.index)
+
+    @property
+    def text(self) -> str:
+        return str(self._store.body(self.index), "utf-8", errors="replace")
+
+    def as_tuple(self) -> Tuple[int, str, float, str, datetime]:
+        """Return the (status_code, text, response_time, url, timestamp) shape of -4's http_get."""
+        return self.status, self.text, self.response_time, self.url, self.timestamp
+
+
+class ResultStore:
+    """Append-only columnar store for fetch results.
+
+    Status codes, response times, timestamps (epoch seconds) and URL ids live
+    in typed arrays. Bodies are concatenated into one bytearray arena indexed
+    by offsets, and each distinct URL is stored once. Nothing per-row is
+    allocated until a row is read through store[i], which returns a ResultView.
+    """
+
+    def __init__(self):
+        self.status_codes = array("h")
+        self.response_times = array("d")
+        self.timestamps = array("d")
+        self.url_ids = array("I")
+        self.offsets = array("Q", [0])
+        self.arena = bytearray()
+        self.urls: List[str] = []
+        self._url_index: Dict[str, int] = {}
+
+    def append(self, status: int, body: Union[str, bytes], response_time: float, url: str,
+               timestamp: Union[float, datetime, None] = None):
+        """Add one row. If any column cannot grow, the row is rolled back and the error re-raised.
+
+        That happens with an out-of-range status, or while a NumPy view from
+        as_numpy() (or any other buffer export) still holds a column.
+        """
+        url_id = self._url_index.get(url, len(self.urls))
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc)
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        row = len(self)
+        arena_size = len(self.arena)
+        try:
+            self.arena += body.encode() if isinstance(body, str) else body
+            self.status_codes.append(status)
+            self.response_times.append(response_time)
+            self.timestamps.append(timestamp)
+            self.url_ids.append(url_id)
+            self.offsets.append(len(self.arena))
+        except BaseException:
+            # Only trim what grew: even an empty del fails on a column that is exporting buffers.
+            for column, size in ((self.status_codes, row), (self.response_times, row), (self.timestamps, row),
+                                 (self.url_ids, row), (self.offsets, row + 1), (self.arena, arena_size)):
+                if len(column) > size:
+                    del column[size:]
+            raise
+        if url_id == len(self.urls):
+            self._url_index[url] = url_id
+            self.urls.append(url)
+
+    def body(self, index: int) -> bytes:
+        return bytes(self.arena[self.offsets[index]:self.offsets[index + 1]])
+
+    def __len__(self) -> int:
+        return len(self.status_codes)
+
+    def __getitem__(self, index: int) -> ResultView:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ResultStore index out of range")
+        return ResultView(self, index)
+
+    def __iter__(self) -> Iterator[ResultView]:
+        return (ResultView(self, index) for index in range(len(self)))
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the body arena, not counting interned URLs."""
+        columns = (self.status_codes, self.response_times, self.timestamps, self.url_ids, self.offsets)
+        return sum(column.itemsize * len(column) for column in columns) + len(self.arena)
+
+    def as_numpy(self) -> dict:
+        """Return zero-copy NumPy views of the numeric columns. Needs numpy installed.
+
+        The views pin the columns, so append() raises BufferError until they are
+        released; take a copy (e.g. view.copy()) to keep them while appending.
+        """
+        import numpy as np
+        return {"status_code": np.frombuffer(self.status_codes, dtype=np.int16),
+                "response_time": np.frombuffer(self.response_times, dtype=np.float64),
+                "timestamp": np.frombuffer(self.timestamps, dtype=np.float64),
+                "url_id": np.frombuffer(self.url_ids, dtype=np.uint32)}
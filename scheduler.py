@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from fetch_engine import host_of
+from instrumentation import LatencyHistogram
+
+INTERACTIVE = 0
+NORMAL = 1
+BULK = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NORMAL: "normal", BULK: "bulk"}
+
+
+class _Job:
+    __slots__ = ("url", "host", "tenant", "future", "fetch", "enqueued_at")
+
+    def __init__(self, url: str, tenant: str, future: asyncio.Future, fetch: Callable[[str], Awaitable[Any]]):
+        self.url = url
+        self.host = host_of(url)
+        self.tenant = tenant
+        self.future = future
+        self.fetch = fetch
+        self.enqueued_at = time.perf_counter()
+
+
+class _ClassQueue:
+    """Jobs of one priority class, ordered by start-time fair queuing tags across tenants.
+
+    Jobs found waiting on a saturated host are moved from `heap` to that host's
+    `parked` heap, and come back one per freed slot.
+    """
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, _Job]] = []
+        self.parked: Dict[str, List[Tuple[float, int, _Job]]] = {}
+        self.virtual_time = 0.0
+        self.last_finish: Dict[str, float] = {}
+        self.wait = LatencyHistogram()
+        self.dispatched = 0
+
+
+class FairScheduler:
+    """Schedule fetch(url) calls from many callers by priority class, tenant weight and host.
+
+    A higher class (INTERACTIVE < NORMAL < BULK) is always dispatched before a
+    lower one, so a lookup overtakes a queued crawl. Within a class, each
+    tenant's jobs get virtual finish tags spaced 1 / weight apart. Dispatching
+    in tag order gives each tenant a share of the slots proportional to its
+    weight, however many URLs it queued. At most `concurrency` calls run at
+    once, and at most `per_host` to any one host. A job whose host is
+    saturated is parked until that host frees a slot, so one slow host
+    neither blocks the queue behind it nor gets rescanned on every dispatch.
+
+        scheduler = FairScheduler(lambda url: http_get(client, url), weights={"crawler": 1, "api": 4})
+        status = await scheduler.fetch(url, tenant="api", priority=INTERACTIVE)
+
+    A job may bring its own fetch callable, which is how the scripts'
+    http_get_parallel(scheduler=...) routes each caller's requests, with its
+    own client and timeout, through one shared scheduler.
+    """
+
+    def __init__(self, fetch: Optional[Callable[[str], Awaitable[Any]]] = None, concurrency: int = 100,
+                 per_host: int = 10, weights: Optional[Dict[str, float]] = None):
+        self._fetch = fetch
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.weights = weights or {}
+        self._classes = {priority: _ClassQueue() for priority in PRIORITY_NAMES}
+        self._sequence = itertools.count()
+        self._host_inflight: Dict[str, int] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def submit(self, url: str, tenant: str = "default", priority: int = NORMAL,
+               fetch: Optional[Callable[[str], Awaitable[Any]]] = None) -> asyncio.Future:
+        """Queue url and return a future for its result; cancel the future to drop the job.
+
+        fetch overrides the scheduler's own fetch callable for this job.
+        """
+        fetch = fetch or self._fetch
+        if fetch is None:
+            raise ValueError("no fetch callable: pass one to FairScheduler or to submit")
+        queue = self._classes[priority]
+        job = _Job(url, tenant, asyncio.get_running_loop().create_future(), fetch)
+        start = max(queue.virtual_time, queue.last_finish.get(tenant, 0.0))
+        finish = start + 1.0 / self.weights.get(tenant, 1.0)
+        queue.last_finish[tenant] = finish
+        heapq.heappush(queue.heap, (finish, next(self._sequence), job))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._wake.set()
+        return job.future
+
+    async def fetch(self, url: str, tenant: str = "default", priority: int = NORMAL,
+                    fetch: Optional[Callable[[str], Awaitable[Any]]] = None) -> Any:
+        return await self.submit(url, tenant, priority, fetch)
+
+    async def fetch_many(self, urls: Iterable[str], tenant: str = "default", priority: int = NORMAL,
+                         fetch: Optional[Callable[[str], Awaitable[Any]]] = None) -> List[Any]:
+        """Queue every URL and return results in input order, with exceptions in place of results."""
+        futures = [self.submit(url, tenant, priority, fetch) for url in urls]
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    def _next_job(self) -> Optional[_Job]:
+        for queue in self._classes.values():
+            while queue.heap:
+                entry = heapq.heappop(queue.heap)
+                job = entry[2]
+                if job.future.done():
+                    continue
+                if self._host_inflight.get(job.host, 0) >= self.per_host:
+                    heapq.heappush(queue.parked.setdefault(job.host, []), entry)
+                    continue
+                queue.virtual_time = entry[0]
+                queue.dispatched += 1
+                queue.wait.record(time.perf_counter() - job.enqueued_at)
+                return job
+        return None
+
+    def _unpark(self, host: str):
+        """Move as many parked jobs for host back into their queues as it has free slots, best class first."""
+        free = self.per_host - self._host_inflight.get(host, 0)
+        for queue in self._classes.values():
+            parked = queue.parked.get(host)
+            while parked and free > 0:
+                entry = heapq.heappop(parked)
+                if not entry[2].future.done():
+                    heapq.heappush(queue.heap, entry)
+                    free -= 1
+            if parked is not None and not parked:
+                del queue.parked[host]
+            if free <= 0:
+                return
+
+    async def _dispatch(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while len(self._running) < self.concurrency and (job := self._next_job()) is not None:
+                self._host_inflight[job.host] = self._host_inflight.get(job.host, 0) + 1
+                task = asyncio.create_task(self._run(job))
+                self._running.add(task)
+                task.add_done_callback(self._finished)
+
+    async def _run(self, job: _Job):
+        try:
+            result = await job.fetch(job.url)
+        except asyncio.CancelledError:
+            # aclose() cancelled a job in flight; its caller must not wait forever.
+            job.future.cancel()
+            raise
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            users = self._host_inflight[job.host] - 1
+            if users:
+                self._host_inflight[job.host] = users
+            else:
+                del self._host_inflight[job.host]
+            self._unpark(job.host)
+
+    def _finished(self, task: asyncio.Task):
+        self._running.discard(task)
+        self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, dispatch count and wait-time percentiles (seconds) per priority class."""
+        classes = {}
+        for priority, queue in self._classes.items():
+            classes[PRIORITY_NAMES[priority]] = {
+                "depth": sum(1 for entries in (queue.heap, *queue.parked.values())
+                             for _, _, job in entries if not job.future.done()),
+                "dispatched": queue.dispatched,
+                "wait_p50": queue.wait.percentile(0.5),
+                "wait_p99": queue.wait.percentile(0.99),
+                "wait_max": queue.wait.max / 1_000_000,
+            }
+        return {"running": len(self._running), "classes": classes}
+
+    async def aclose(self):
+        """Cancel queued and running jobs and stop dispatching."""
+        tasks = list(self._running)
+        if self._dispatcher is not None:
+            tasks.append(self._dispatcher)
+            self._dispatcher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for queue in self._classes.values():
+            for entries in (queue.heap, *queue.parked.values()):
+                for _, _, job in entries:
+                    job.future.cancel()
+            queue.heap.clear()
+            queue.parked.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,173 @@
+import asyncio
+import httpx
+import json
+import multiprocessing
+import pickle
+import queue
+import time
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from fetch_engine import stream_bounded
+from http_stream import http_get
+
+
+def keep_body(status: int, body: str) -> str:
+    """Default handler: send the response text back unchanged."""
+    return body
+
+
+def parse_json(status: int, body: str) -> Any:
+    """Handler that decodes JSON bodies in the worker process instead of the parent."""
+    return json.loads(body)
+
+
+def _batched(urls: Iterable[str], batch_size: int) -> Iterator[Tuple[int, List[str]]]:
+    iterator = iter(urls)
+    start = 0
+    while batch := list(islice(iterator, batch_size)):
+        yield start, batch
+        start += len(batch)
+
+
+def _pack(start: int, records: List[Tuple[int, str, int, Any]]) -> bytes:
+    """Pickle a finished batch here, so a handler value that cannot be pickled becomes an error record.
+
+    Left to multiprocessing, such a value is dropped by the queue's feeder
+    thread and the parent waits for the batch forever.
+    """
+    try:
+        return pickle.dumps((start, records))
+    except Exception:
+        safe = []
+        for index, url, status, value in records:
+            try:
+                pickle.dumps(value)
+            except Exception as e:
+                status, value = -1, f"Error: handler result for {url} could not be pickled. Error: {str(e)}"
+            safe.append((index, url, status, value))
+        return pickle.dumps((start, safe))
+
+
+async def _worker_main(task_queue, result_queue, timeout: int, concurrency: int, per_host: int,
+                       handler: Callable[[int, str], Any]):
+    loop = asyncio.get_running_loop()
+    limits = httpx.Limits(max_connections=concurrency)
+    records: Dict[int, List[Tuple[int, str, int, Any]]] = {}  # batch start -> finished records
+    left: Dict[int, int] = {}  # batch start -> URLs still running
+    owners: Dict[int, Tuple[int, int]] = {}  # stream index -> (batch start, input index)
+    room = asyncio.Event()
+
+    async def take_batches() -> AsyncIterator[str]:
+        """Feed queued batches into one engine, taking another only while fewer than `concurrency` URLs are unfinished."""
+        index = 0
+        while True:
+            while len(owners) >= concurrency:
+                room.clear()
+                await room.wait()
+            if (batch := await loop.run_in_executor(None, task_queue.get)) is None:
+                return
+            start, urls = batch
+            records[start] = []
+            left[start] = len(urls)
+            for offset, url in enumerate(urls):
+                owners[index] = (start, start + offset)
+                index += 1
+                yield url
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        async for index, url, result in stream_bounded(take_batches(), lambda url: http_get(client, url, timeout),
+                                                       concurrency=concurrency, per_host=per_host):
+            start, position = owners.pop(index)
+            room.set()
+            if isinstance(result, Exception):
+                record = (position, url, -1, f"Error: {str(result)}")
+            else:
+                status, body, _ = result
+                try:
+                    record = (position, url, status, handler(status, body))
+                except Exception as e:
+                    record = (position, url, -1, f"Error: handler failed for {url}. Error: {str(e)}")
+            records[start].append(record)
+            left[start] -= 1
+            if not left[start]:
+                del left[start]
+                batch = sorted(records.pop(start), key=lambda record: record[0])
+                result_queue.put(_pack(start, batch))
+
+
+def _worker(task_queue, result_queue, timeout, concurrency, per_host, handler):
+    asyncio.run(_worker_main(task_queue, result_queue, timeout, concurrency, per_host, handler))
+
+
+def fetch_multiprocess(urls: Iterable[str], timeout: int = 10, processes: Optional[int] = None,
+                       batch_size: int = 50, concurrency: int = 100, per_host: int = 10,
+                       handler: Callable[[int, str], Any] = keep_body,
+                       poll_interval: float = 1.0) -> Iterator[Tuple[int, str, int, Any]]:
+    """Fetch urls across worker processes and yield (index, url, status, value) in input order.
+
+    Each worker runs its own event loop and httpx client, and feeds batches of
+    `batch_size` URLs from a shared queue into one long-lived stream_bounded.
+    It takes the next batch whenever fewer than `concurrency` of its URLs are
+    unfinished, so a slow URL holds one slot rather than idling the process
+    until its batch completes. `handler(status, body)` runs in the worker and its return value is
+    sent back, which keeps CPU-heavy work such as JSON decoding off the parent.
+    It must be a module-level function so it can be pickled. At most
+    4 * processes batches are in flight or waiting to be reordered at once.
+    The parent checks on the workers every `poll_interval` seconds while it
+    waits. If one has died (crash, OOM kill) with batches still outstanding,
+    RuntimeError is raised instead of blocking forever.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    max_buffered = processes * 4
+    task_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_worker, daemon=True,
+                                       args=(task_queue, result_queue, timeout, concurrency, per_host, handler))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+
+    batches = _batched(urls, batch_size)
+    outstanding = 0
+    pending: Dict[int, list] = {}
+    next_start = 0
+    finished = False
+    try:
+        for batch in islice(batches, max_buffered):
+            task_queue.put(batch)
+            outstanding += 1
+        while outstanding:
+            try:
+                start, records = pickle.loads(result_queue.get(timeout=poll_interval))
+            except queue.Empty:
+                dead = [worker for worker in workers if worker.exitcode is not None]
+                if dead:
+                    raise RuntimeError(f"{len(dead)} worker process(es) exited (exit code {dead[0].exitcode})"
+                                       f" with {outstanding} batch(es) outstanding")
+                continue
+            outstanding -= 1
+            pending[start] = records
+            while next_start in pending:
+                records = pending.pop(next_start)
+                yield from records
+                next_start += len(records)
+            while outstanding + len(pending) < max_buffered and (batch := next(batches, None)) is not None:
+                task_queue.put(batch)
+                outstanding += 1
+        finished = True
+    finally:
+        for _ in workers:
+            task_queue.put(None)
+        for worker in workers:
+            if not finished:
+                worker.terminate()
+            worker.join()
+
+
+if __name__ == '__main__':
+    urls = [f'https://jsonplaceholder.typicode.com/posts/{i}' for i in range(1, 101)]
+
+    start_time = time.monotonic()
+    print('Trying fetchMultiprocess...')
+    results = list(fetch_multiprocess(urls, timeout=10, handler=parse_json))
+    print(f"Fetched {len(results)} URLs in {time.monotonic() - start_time} seconds")
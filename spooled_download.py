@@ -0,0 +1,78 @@
+import asyncio
+import mmap
+import tempfile
+from pathlib import Path
+from typing import IO, NamedTuple, Optional, Union
+
+import httpx
+
+
+class Download(NamedTuple):
+    status: int
+    size: int
+    body: Union[mmap.mmap, IO[bytes]]  # mmap, open file or SpooledTemporaryFile, positioned at 0
+    path: Optional[Path]
+
+
+async def download(client: httpx.AsyncClient, url: str, path: Optional[Path] = None, timeout: int = 15,
+                   chunk_size: int = 64 * 1024, spool_max: int = 1024 * 1024, use_mmap: bool = True) -> Download:
+    """Stream a response body to disk chunk by chunk instead of reading it into memory.
+
+    When the response has a Content-Length and no Content-Encoding, the target
+    file (path, or an anonymous temp file) is sized up front and the body is
+    written into an mmap of it, which is returned. Otherwise the body goes to
+    path, or to a SpooledTemporaryFile that stays in memory up to spool_max
+    bytes before rolling over to disk, and the open file is returned. In
+    both cases memory use is bounded by chunk_size and spool_max, not the
+    body size. The caller owns the returned handle and must close it.
+    """
+    async with client.stream("GET", url, timeout=timeout) as response:
+        length = response.headers.get("content-length", "")
+        encoded = response.headers.get("content-encoding", "identity") != "identity"
+        if use_mmap and length.isdigit() and int(length) > 0 and not encoded:
+            return await _download_mmap(response, path, int(length), chunk_size)
+
+        file = path.open("w+b") if path else tempfile.SpooledTemporaryFile(max_size=spool_max)
+        try:
+            size = 0
+            async for chunk in response.aiter_bytes(chunk_size):
+                file.write(chunk)
+                size += len(chunk)
+            file.seek(0)
+        except BaseException:
+            file.close()
+            raise
+        return Download(response.status_code, size, file, path)
+
+
+async def _download_mmap(response: httpx.Response, path: Optional[Path], length: int, chunk_size: int) -> Download:
+    with (path.open("w+b") if path else tempfile.TemporaryFile()) as file:
+        file.truncate(length)
+        # The mapping stays valid after the file object is closed.
+        body = mmap.mmap(file.fileno(), length)
+    try:
+        position = 0
+        async for chunk in response.aiter_raw(chunk_size):
+            end = position + len(chunk)
+            if end > length:
+                raise httpx.RemoteProtocolError(f"Response from {response.url} is longer than its Content-Length")
+            body[position:end] = chunk
+            position = end
+        if position != length:
+            raise httpx.RemoteProtocolError(f"Response from {response.url} ended after {position} of {length} bytes")
+    except BaseException:
+        body.close()
+        raise
+    return Download(response.status_code, length, body, path)
+
+
+async def test_async():
+    async with httpx.AsyncClient() as client:
+        for url in ['https://httpbin.org/bytes/102400', 'https://httpbin.org/stream-bytes/102400']:
+            result = await download(client, url)
+            print(f"URL: {url}, Response: {result.status}, Size: {result.size}, Body: {type(result.body).__name__}")
+            result.body.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(test_async())
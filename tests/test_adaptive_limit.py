@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+from adaptive_limit import AdaptiveLimiter, is_failure
+from fetch_engine import stream_bounded
+
+
+class AdaptiveLimiterTest(unittest.IsolatedAsyncioTestCase):
+    def test_is_failure(self):
+        self.assertTrue(is_failure(("TimeoutError: Request to http://a/ timed out.", "")))
+        self.assertTrue(is_failure((503, "")))
+        self.assertTrue(is_failure(-1))
+        self.assertTrue(is_failure(ValueError()))
+        self.assertFalse(is_failure((200, "ok")))
+        self.assertFalse(is_failure(404))
+
+    async def test_timeout_results_drive_the_limit_down(self):
+        limiter = AdaptiveLimiter(initial=10)
+
+        async def fetch(url):
+            return f"TimeoutError: Request to {url} timed out.", ""
+
+        urls = [f"http://a/{index}" for index in range(200)]
+        async for _ in stream_bounded(urls, fetch, concurrency=10, limiter=limiter):
+            pass
+        self.assertEqual(limiter.limit("a"), 1)
+
+    async def test_cancelled_requests_free_their_slot_without_a_sample(self):
+        limiter = AdaptiveLimiter(initial=4)
+        started = asyncio.Event()
+
+        async def fetch(url):
+            started.set()
+            await asyncio.sleep(10)
+
+        stream = stream_bounded([f"http://a/{index}" for index in range(8)], fetch, concurrency=8, limiter=limiter)
+        consumer = asyncio.ensure_future(stream.__anext__())
+        await started.wait()
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await stream.aclose()
+        snapshot = limiter.snapshot()["a"]
+        self.assertEqual((snapshot["in_flight"], snapshot["limit"], snapshot["error_rate"]), (0, 4, 0.0))
+        self.assertEqual(len(limiter._state("a").latencies), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import io
+import json
+import subprocess
+import sys
+import unittest
+from async_log import INFO, AsyncLogger
+
+
+class AsyncLoggerTest(unittest.TestCase):
+    def test_level_and_sampling(self):
+        stream = io.StringIO()
+        log = AsyncLogger(level=INFO, sample={"noisy": 0.0}, stream=stream)
+        log.debug("hidden")
+        log.info("noisy")
+        log.info("kept", url="http://a/1")
+        log.close()
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([(line["event"], line["url"]) for line in lines], [("kept", "http://a/1")])
+
+    def test_queued_records_are_flushed_at_exit(self):
+        code = ("from async_log import AsyncLogger, DEBUG\n"
+                "log = AsyncLogger(level=DEBUG)\n"
+                "for index in range(5000):\n"
+                "    log.debug('response', index=index)\n")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(len(result.stderr.splitlines()), 5000)
+        self.assertEqual(json.loads(result.stderr.splitlines()[-1])["index"], 4999)
+
+
+if __name__ == "__main__":
+    unittest.main()
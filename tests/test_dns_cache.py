@@ -0,0 +1,25 @@
+import socket
+import subprocess
+import sys
+import unittest
+from dns_cache import DnsCache
+
+
+class DnsCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def test_overrides(self):
+        dns = DnsCache(overrides={"example.test": ["127.0.0.1", "::1"]})
+        self.assertEqual(await dns.resolve("example.test"),
+                         [(socket.AF_INET, "127.0.0.1"), (socket.AF_INET6, "::1")])
+        dns.override("alias.test", "localhost")
+        self.assertIn((socket.AF_INET, "127.0.0.1"), await dns.resolve("alias.test"))
+        with self.assertRaises(ValueError):
+            dns.override("example.test", "")
+
+    def test_engine_imports_without_http_libraries(self):
+        code = ("import sys; sys.modules.update(dict.fromkeys(('aiohttp', 'httpx', 'httpcore')));"
+                "import fetch_engine, raw_http")
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+from fetch_engine import fetch_bounded, plan_by_origin, stream_bounded
+
+
+class FetchEngineTest(unittest.IsolatedAsyncioTestCase):
+    def test_plan_by_origin(self):
+        urls = ["http://a/1", "http://b/1", "http://a/2", "http://b/2", "http://a/3"]
+        self.assertEqual(plan_by_origin(urls, per_host=2), [0, 2, 1, 3, 4])
+
+    async def test_grouped_results_keep_input_order(self):
+        urls = [f"http://{host}/{index}" for index in range(30) for host in "abc"]
+        dispatched = []
+
+        async def fetch(url):
+            dispatched.append(url)
+            await asyncio.sleep(0)
+            return url
+
+        self.assertEqual(await fetch_bounded(urls, fetch, concurrency=4, grouped=True, group_window=20), urls)
+        self.assertEqual(sorted(dispatched), sorted(urls))
+        self.assertNotEqual(dispatched, urls)
+
+    async def test_grouped_async_source_stays_lazy(self):
+        read = []
+        first_fetch_after = []
+
+        async def source():
+            for index in range(1000):
+                read.append(index)
+                yield f"http://h{index % 3}/{index}"
+
+        async def fetch(url):
+            if not first_fetch_after:
+                first_fetch_after.append(len(read))
+            return url
+
+        results = await fetch_bounded(source(), fetch, concurrency=4, grouped=True, group_window=10)
+        self.assertEqual(results, [f"http://h{index % 3}/{index}" for index in range(1000)])
+        self.assertLess(first_fetch_after[0], 100)
+
+    async def test_grouped_none_only_groups_collections(self):
+        urls = ["http://a/1", "http://b/1", "http://a/2"]
+
+        async def source():
+            for url in urls:
+                yield url
+
+        for source_urls, expected in ((urls, ["http://a/1", "http://a/2", "http://b/1"]), (source(), urls)):
+            dispatched = []
+
+            async def fetch(url):
+                dispatched.append(url)
+                return url
+
+            self.assertEqual(await fetch_bounded(source_urls, fetch, concurrency=1, grouped=None), urls)
+            self.assertEqual(dispatched, expected)
+
+    async def test_stream_bounded_per_host_cap(self):
+        running = {"a": 0}
+        peak = []
+
+        async def fetch(url):
+            running["a"] += 1
+            peak.append(running["a"])
+            await asyncio.sleep(0.01)
+            running["a"] -= 1
+            return url
+
+        records = [record async for record in stream_bounded([f"http://a/{index}" for index in range(20)], fetch,
+                                                              concurrency=10, per_host=3, ordered=True)]
+        self.assertEqual([index for index, _, _ in records], list(range(20)))
+        self.assertEqual(max(peak), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
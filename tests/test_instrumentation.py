@@ -0,0 +1,41 @@
+import unittest
+from bench_local import LocalServer
+from client_pool import ClientPool
+from dns_cache import DnsCache
+from instrumentation import Instrumentation, LatencyHistogram
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_percentiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        for millis in range(1, 1001):
+            histogram.record(millis / 1000)
+        self.assertAlmostEqual(histogram.percentile(0.5), 0.5, delta=0.5 * 0.016)
+        self.assertAlmostEqual(histogram.percentile(0.99), 0.99, delta=0.99 * 0.016)
+        self.assertEqual(histogram.cumulative([0.0005, 2.0]), [0, 1000])
+
+
+class InstrumentationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_backends_record_the_same_phases(self):
+        async with LocalServer() as server:
+            url = f"http://bench.test:{server.port}/bytes/10"
+            phases = {}
+            for backend in ("httpx", "aiohttp"):
+                instrumentation = Instrumentation()
+                dns = DnsCache(overrides={"bench.test": ["127.0.0.1"]})
+                async with ClientPool(instrumentation=instrumentation, dns=dns) as pool:
+                    for _ in range(2):
+                        if backend == "httpx":
+                            await pool.httpx_client().get(url)
+                        else:
+                            async with pool.aiohttp_session().get(url) as response:
+                                await response.read()
+                phases[backend] = {phase: histogram.count
+                                   for (phase, _), histogram in instrumentation.by_host.items()}
+                self.assertEqual(instrumentation.by_status[200].count, 2)
+        self.assertEqual(phases["httpx"], {"dns": 1, "connect": 1, "first_byte": 2, "body": 2, "total": 2})
+        self.assertEqual(phases["aiohttp"], phases["httpx"])
+
+
+if __name__ == "__main__":
+    unittest.main()
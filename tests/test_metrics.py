@@ -0,0 +1,39 @@
+import unittest
+from metrics import FetchMetrics, Registry
+from transports import FetchResult
+
+
+def sample(registry: Registry, line_start: str) -> float:
+    for line in registry.render().splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_start} not rendered")
+
+
+class FetchMetricsTest(unittest.IsolatedAsyncioTestCase):
+    async def fetch_all(self, results):
+        metrics = FetchMetrics()
+        results = iter(results)
+
+        async def fetch(url):
+            return next(results)
+
+        measured = metrics.wrap(fetch)
+        for _ in range(3):
+            await measured("http://a/x")
+        return metrics.registry
+
+    async def test_bytes_in_counts_encoded_bytes(self):
+        registry = await self.fetch_all([(200, "héllo"), b"abc",
+                                         FetchResult("http://a/x", 200, b"12345", 0.0, {})])
+        self.assertEqual(sample(registry, "fetch_bytes_in_total"), 6 + 3 + 5)
+        self.assertEqual(sample(registry, 'fetch_requests_total{status="200"}'), 2)
+
+    async def test_empty_tuple_result_is_not_an_error(self):
+        registry = await self.fetch_all([(), (), ()])
+        self.assertEqual(sample(registry, 'fetch_requests_total{status="unknown"}'), 3)
+        self.assertEqual(sample(registry, "fetch_errors_total"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from job_journal import JobJournal
+from ndjson_sink import NdjsonWriter
+
+
+class NdjsonWriterTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def test_append_drops_a_torn_last_line(self):
+        path = self.directory / "results.ndjson"
+        path.write_bytes(b'{"index":0}\n{"index":1}\n{"ind')
+        with NdjsonWriter(path, append=True) as writer:
+            location, offset = writer.write({"index": 2})
+        self.assertEqual((location, offset), (path, 24))
+        self.assertEqual([json.loads(line)["index"] for line in path.read_text().splitlines()], [0, 1, 2])
+
+    def test_rotation(self):
+        path = self.directory / "results.ndjson"
+        with NdjsonWriter(path, max_bytes=30) as writer:
+            for index in range(5):
+                writer.write({"index": index})
+        self.assertEqual(writer.part, 2)
+        self.assertEqual(len(path.read_text().splitlines()), 2)
+
+    def test_journal_resume_skips_committed_jobs(self):
+        path = self.directory / "journal.db"
+        urls = [f"http://a/{index}" for index in range(5)]
+        with JobJournal(path, batch_size=2) as journal:
+            journal.record(0, urls[0], 200)
+            journal.record(3, urls[3], 404, self.directory / "out.ndjson", 12)
+        with JobJournal(path) as journal:
+            self.assertEqual([index for index, _ in journal.remaining(urls)], [1, 2, 4])
+            self.assertEqual(list(journal.results())[1][2:], (404, str(self.directory / "out.ndjson"), 12))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+from response_cache import freshness, parse_cache_control
+
+
+class FreshnessTest(unittest.TestCase):
+    def test_max_age(self):
+        self.assertEqual(freshness({"cache-control": "public, max-age=60"}, 0.0, None), 60.0)
+        self.assertEqual(freshness({"cache-control": "max-age=60, s-maxage=5"}, 0.0, None), 5.0)
+
+    def test_directive_without_value(self):
+        self.assertEqual(parse_cache_control("public, max-age"), {"public": None, "max-age": None})
+        self.assertIsNone(freshness({"cache-control": "public, max-age"}, 0.0, None))
+        self.assertEqual(freshness({"cache-control": "s-maxage, max-age=30"}, 0.0, None), 30.0)
+        self.assertEqual(freshness({"cache-control": "max-age", "etag": '"v1"'}, 0.0, None), 0.0)
+
+    def test_no_store_and_no_cache(self):
+        self.assertIsNone(freshness({"cache-control": "no-store, max-age=60"}, 0.0, 10.0))
+        self.assertEqual(freshness({"cache-control": "no-cache"}, 0.0, 10.0), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import heapq
+import unittest
+from unittest import mock
+from scheduler import BULK, INTERACTIVE, FairScheduler
+
+
+class FairSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_aclose_cancels_callers_of_running_jobs(self):
+        async def slow(url):
+            await asyncio.sleep(10)
+
+        scheduler = FairScheduler(slow)
+        caller = asyncio.ensure_future(scheduler.fetch("http://a/1"))
+        await asyncio.sleep(0.05)
+        await scheduler.aclose()
+        with self.assertRaises(asyncio.CancelledError):
+            await asyncio.wait_for(caller, 1)
+
+    async def test_saturated_host_is_parked_not_blocking(self):
+        release = asyncio.Event()
+        order = []
+
+        async def fetch(url):
+            if "slow" in url:
+                await release.wait()
+            order.append(url)
+            return url
+
+        async with FairScheduler(fetch, per_host=1) as scheduler:
+            slow = [scheduler.submit(f"http://slow/{index}") for index in range(5)]
+            self.assertEqual(await scheduler.fetch("http://fast/1"), "http://fast/1")
+            self.assertEqual(scheduler.stats()["classes"]["normal"]["depth"], 4)
+            release.set()
+            self.assertEqual(await asyncio.gather(*slow), [f"http://slow/{index}" for index in range(5)])
+        self.assertEqual(order[0], "http://fast/1")
+
+    async def test_parked_jobs_are_not_rescanned(self):
+        async def fetch(url):
+            await asyncio.sleep(0)
+
+        pops = []
+        for count in (200, 400):
+            with mock.patch("scheduler.heapq.heappop", side_effect=heapq.heappop) as heappop:
+                async with FairScheduler(fetch, per_host=1) as scheduler:
+                    await scheduler.fetch_many([f"http://a/{index}" for index in range(count)])
+            pops.append(heappop.call_count)
+        # Rescanning the queue on every dispatch grows with count ** 2.
+        self.assertLess(pops[1], 2.5 * pops[0])
+        self.assertLess(pops[1], 4 * 400)
+
+    async def test_interactive_overtakes_bulk(self):
+        order = []
+
+        async def fetch(url):
+            order.append(url)
+            await asyncio.sleep(0)
+
+        async with FairScheduler(fetch, concurrency=1) as scheduler:
+            bulk = scheduler.fetch_many([f"http://bulk/{index}" for index in range(5)], priority=BULK)
+            bulk = asyncio.ensure_future(bulk)
+            await asyncio.sleep(0)
+            await scheduler.fetch("http://lookup/1", priority=INTERACTIVE)
+            await bulk
+        self.assertLess(order.index("http://lookup/1"), 2)
+
+    async def test_job_fetch_overrides_scheduler_fetch(self):
+        async def fetch(url):
+            return "scheduler"
+
+        async def own(url):
+            return "job"
+
+        async with FairScheduler(fetch) as scheduler:
+            self.assertEqual(await scheduler.fetch("http://a/1", fetch=own), "job")
+        with self.assertRaises(ValueError):
+            FairScheduler().submit("http://a/1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+import time
+import unittest
+from bench_local import LocalServer
+from sharded_fetch import fetch_multiprocess
+
+
+def unpicklable(status, body):
+    return lambda: body
+
+
+class ShardedFetchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.server = LocalServer()
+        threading.Thread(target=cls.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(cls.server.__aenter__(), cls.loop).result()
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.server.__aexit__(None, None, None), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+
+    def test_slow_url_does_not_idle_its_process(self):
+        urls = [f"{self.server.base_url}/delay/1000"] + [f"{self.server.base_url}/delay/100?{index}"
+                                                         for index in range(40)]
+        start_time = time.perf_counter()
+        results = list(fetch_multiprocess(urls, processes=1, batch_size=4, concurrency=8, per_host=8))
+        seconds = time.perf_counter() - start_time
+        self.assertEqual([record[:3] for record in results], [(index, url, 200) for index, url in enumerate(urls)])
+        # One batch at a time takes 1s for the first batch plus 0.1s for each of the other nine.
+        self.assertLess(seconds, 1.85)
+
+    def test_unpicklable_result_becomes_error_record(self):
+        urls = [f"{self.server.base_url}/bytes/3"] * 3
+        results = list(fetch_multiprocess(urls, processes=1, handler=unpicklable))
+        self.assertEqual([status for _, _, status, _ in results], [-1, -1, -1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+from bench_local import LocalServer
+from transports import TRANSPORTS, get_transport
+
+
+class TransportTest(unittest.IsolatedAsyncioTestCase):
+    async def test_backends_return_the_same_result_shape(self):
+        async with LocalServer() as server:
+            for name in TRANSPORTS:
+                transport = get_transport(name)
+                try:
+                    result = await transport.get(f"{server.base_url}/bytes/5")
+                finally:
+                    await transport.aclose()
+                with self.subTest(backend=name):
+                    self.assertEqual((result.status, result.body, result.error), (200, b"xxxxx", None))
+                    self.assertEqual(result.headers["content-length"], "5")
+                    self.assertEqual(result.headers["content-type"], "text/plain")
+
+
+if __name__ == "__main__":
+    unittest.main()
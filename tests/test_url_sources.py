@@ -0,0 +1,33 @@
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+from url_sources import iter_jsonl, iter_lines, read_lines
+
+
+class UrlSourcesTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def test_iter_lines_reads_gzip_and_skips_comments(self):
+        path = self.directory / "urls.txt.gz"
+        with gzip.open(path, "wt") as f:
+            f.write("# seed list\nhttp://a/1\n\n  http://b/2  \n")
+        self.assertEqual(list(iter_lines(path)), ["http://a/1", "http://b/2"])
+
+    def test_iter_jsonl_skips_lines_that_are_not_objects(self):
+        path = self.directory / "urls.jsonl"
+        path.write_text('{"url": "http://a/1"}\n[1, 2]\n"http://x"\n{"url": 5}\n{"other": 1}\n\n{"url": "http://b/2"}\n')
+        self.assertEqual(list(iter_jsonl(path)), ["http://a/1", "http://b/2"])
+
+    async def test_read_lines_streams_every_line(self):
+        path = self.directory / "urls.txt"
+        path.write_text("".join(f"http://a/{index}\n" for index in range(2000)))
+        self.assertEqual([url async for url in read_lines(path, limit=100)],
+                         [f"http://a/{index}" for index in range(2000)])
+
+
+if __name__ == "__main__":
+    unittest.main()
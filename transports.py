@@ -0,0 +1,141 @@
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import aiohttp
+import httpx
+from fetch_engine import fetch_bounded
+from raw_http import RawClient
+
+
+class FetchResult(NamedTuple):
+    url: str
+    status: int            # -1 when the request failed
+    body: bytes
+    elapsed: float         # seconds, from time.perf_counter
+    headers: Dict[str, str]  # lower-case names on every backend
+    error: Optional[str] = None
+
+
+def failed(url: str, error: BaseException, elapsed: float) -> FetchResult:
+    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)):
+        return FetchResult(url, -1, b"", elapsed, {}, f"TimeoutError: Request to {url} timed out.")
+    return FetchResult(url, -1, b"", elapsed, {}, f"Error: An error occurred while requesting {url}. Error: {str(error)}")
+
+
+class AiohttpTransport:
+    name = "aiohttp"
+
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, **session_kwargs):
+        self._session = session
+        self._owned = session is None
+        self._session_kwargs = session_kwargs
+
+    async def get(self, url: str, timeout: float = 15) -> FetchResult:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(**self._session_kwargs)
+        start_time = time.perf_counter()
+        try:
+            async with self._session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                body = await response.read()
+                headers = {name.lower(): value for name, value in response.headers.items()}
+                return FetchResult(url, response.status, body, time.perf_counter() - start_time, headers)
+        except Exception as e:
+            return failed(url, e, time.perf_counter() - start_time)
+
+    async def aclose(self):
+        if self._owned and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class HttpxTransport:
+    name = "httpx"
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, **client_kwargs):
+        self._client = client
+        self._owned = client is None
+        self._client_kwargs = client_kwargs
+
+    async def get(self, url: str, timeout: float = 15) -> FetchResult:
+        if self._client is None:
+            self._client = httpx.AsyncClient(**self._client_kwargs)
+        start_time = time.perf_counter()
+        try:
+            response = await self._client.get(url, timeout=timeout)
+            return FetchResult(url, response.status_code, response.content, time.perf_counter() - start_time,
+                               dict(response.headers))
+        except Exception as e:
+            return failed(url, e, time.perf_counter() - start_time)
+
+    async def aclose(self):
+        if self._owned and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class RawTransport:
+    """Plain asyncio-streams HTTP/1.1 client (see raw_http) for the lowest per-request overhead."""
+
+    name = "raw"
+
+    def __init__(self, client: Optional[RawClient] = None, **client_kwargs):
+        self._client = client or RawClient(**client_kwargs)
+        self._owned = client is None
+
+    async def get(self, url: str, timeout: float = 15) -> FetchResult:
+        start_time = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._client.get(url), timeout)
+            return FetchResult(url, response.status, response.body, time.perf_counter() - start_time, response.headers)
+        except Exception as e:
+            return failed(url, e, time.perf_counter() - start_time)
+
+    async def aclose(self):
+        if self._owned:
+            await self._client.aclose()
+
+
+TRANSPORTS = {
+    AiohttpTransport.name: AiohttpTransport,
+    HttpxTransport.name: HttpxTransport,
+    RawTransport.name: RawTransport,
+}
+
+
+def get_transport(name: str, **kwargs: Any):
+    """Build a transport by name: "aiohttp", "httpx" or "raw"."""
+    try:
+        return TRANSPORTS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown transport {name!r}, expected one of {sorted(TRANSPORTS)}") from None
+
+
+async def fetch_all(urls: Iterable[str], backend: str = "httpx", timeout: float = 10,
+                    concurrency: int = 100, per_host: int = 10) -> List[FetchResult]:
+    """Fetch urls with the named backend on the bounded worker pool and return FetchResults in input order."""
+    transport = get_transport(backend)
+    try:
+        return await fetch_bounded(urls, lambda url: transport.get(url, timeout),
+                                   concurrency=concurrency, per_host=per_host)
+    finally:
+        await transport.aclose()
+
+
+async def test_async():
+    urls = [
+        'https://jsonplaceholder.typicode.com/posts/1',
+        'https://jsonplaceholder.typicode.com/users/1',
+        'https://httpbin.org/delay/1',
+    ]
+
+    for backend in TRANSPORTS:
+        start_time = time.monotonic()
+        results = await fetch_all(urls, backend=backend)
+        print(f"{backend}: {time.monotonic() - start_time:.2f} seconds")
+        for result in results:
+            print(f"  URL: {result.url}, Response: {result.status}, Bytes: {len(result.body)}, Error: {result.error}")
+
+
+if __name__ == '__main__':
+    asyncio.run(test_async())
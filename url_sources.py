@@ -0,0 +1,108 @@
+import asyncio
+import concurrent.futures
+import gzip
+import json
+import threading
+from pathlib import Path
+from typing import IO, AsyncIterator, Iterable, Iterator, List
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _open(path: Path) -> IO[str]:
+    """Open path for text reading, decompressing it if it starts with the gzip magic bytes."""
+    path = Path(path)
+    with path.open("rb") as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+    if compressed:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return path.open("r", encoding="utf-8")
+
+
+def iter_lines(path: Path) -> Iterator[str]:
+    """Yield one URL per non-blank line of a plain or gzip'd file, skipping # comments."""
+    with _open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def iter_jsonl(path: Path, field: str = "url") -> Iterator[str]:
+    """Yield `field` from each JSON object line of a plain or gzip'd file.
+
+    Lines that are not objects, or whose `field` is missing or not a
+    non-empty string, are skipped.
+    """
+    with _open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                value = record.get(field) if isinstance(record, dict) else None
+                if value and isinstance(value, str):
+                    yield value
+
+
+async def read_ahead(source: Iterable[str], limit: int = 10000, batch_size: int = 256) -> AsyncIterator[str]:
+    """Pull items from a blocking iterable on a background thread, holding at most about `limit` of them.
+
+    File reads and decompression stay off the event loop. Items cross over in
+    batches to keep the per-item cost low. The reader thread blocks once
+    limit // batch_size batches are waiting, so memory stays bounded however
+    large the source is. Closing the async iterator early stops the thread.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(max(1, limit // batch_size))
+    stop = threading.Event()
+    end = object()
+
+    def put(item) -> bool:
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while not stop.is_set():
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+        return False
+
+    def pump():
+        batch: List[str] = []
+        try:
+            for item in source:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(end)
+        except Exception as e:
+            put(e)
+
+    thread = threading.Thread(target=pump, name="url-read-ahead", daemon=True)
+    thread.start()
+    try:
+        while (batch := await queue.get()) is not end:
+            if isinstance(batch, Exception):
+                raise batch
+            for item in batch:
+                yield item
+    finally:
+        stop.set()
+        close = getattr(source, "close", None)
+        await asyncio.to_thread(thread.join)
+        if close is not None:
+            close()
+
+
+def read_lines(path: Path, limit: int = 10000) -> AsyncIterator[str]:
+    """Async stream of URLs from a newline-delimited (optionally gzip'd) file with bounded read-ahead."""
+    return read_ahead(iter_lines(path), limit)
+
+
+def read_jsonl(path: Path, field: str = "url", limit: int = 10000) -> AsyncIterator[str]:
+    """Async stream of URLs from a JSONL (optionally gzip'd) file with bounded read-ahead."""
+    return read_ahead(iter_jsonl(path, field), limit)